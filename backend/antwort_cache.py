@@ -0,0 +1,191 @@
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+ANTWORT_CACHE_SIZE = int(os.getenv("ANTWORT_CACHE_SIZE", "4096"))
+# Optional: SQLite-Datei, über die sich alle uvicorn-Worker eines Hosts die Antworten teilen
+ANTWORT_CACHE_DB = os.getenv("ANTWORT_CACHE_DB", "")
+# Aufräumen der SQLite-Datei nur alle n Schreibvorgänge statt bei jedem
+ANTWORT_CACHE_DB_AUFRAEUMEN = int(os.getenv("ANTWORT_CACHE_DB_AUFRAEUMEN", "256"))
+
+
+def fingerabdruck(daten) -> str:
+    # Inhaltsbasierte Generation: gleiche Daten ergeben in jedem Worker dieselbe Kennung
+    return hashlib.sha1(repr(daten).encode("utf-8")).hexdigest()[:16]
+
+
+class _GeteilterSpeicher:
+    # Zweite Ebene hinter dem Prozess-Cache; begrenzt auf etwa max_size Einträge (älteste zuerst raus).
+    # Blockierende SQLite-Zugriffe: aus der Event-Loop nur über AntwortCache.hole_async/speichere_async.
+    #
+    # Die Worker aktualisieren ihre Feeds unabhängig voneinander und können kurzzeitig verschiedene Generationen
+    # haben. Gelöscht werden deshalb nur Generationen, die dieser Worker selbst abgelöst hat (veraltet), nicht
+    # einfach alles außer der eigenen.
+
+    def __init__(self, pfad, max_size, aufraeumen=ANTWORT_CACHE_DB_AUFRAEUMEN):
+        self.pfad = pfad
+        self.max_size = max_size
+        self.aufraeumen = max(1, aufraeumen)
+        self.veraltet = set()
+        self._verbinde()
+        if hasattr(os, "register_at_fork"):
+            # Eine SQLite-Verbindung darf nicht über fork hinweg geteilt werden (gunicorn --preload)
+            os.register_at_fork(after_in_child=self._verbinde)
+
+    def _verbinde(self):
+        self._lock = threading.Lock()
+        self._schreibvorgaenge = 0
+        self._db = sqlite3.connect(self.pfad, timeout=1, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS antworten "
+            "(schluessel TEXT PRIMARY KEY, generation TEXT, antwort TEXT, zeit REAL)"
+        )
+
+    def hole(self, schluessel, generation):
+        with self._lock:
+            zeile = self._db.execute(
+                "SELECT antwort FROM antworten WHERE schluessel = ? AND generation = ?",
+                (schluessel, generation)
+            ).fetchone()
+        return json.loads(zeile[0]) if zeile else None
+
+    def speichere(self, schluessel, generation, antwort):
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO antworten VALUES (?, ?, ?, ?)",
+                (schluessel, generation, json.dumps(antwort, ensure_ascii=False, default=str), time.time())
+            )
+            self._schreibvorgaenge += 1
+            if self._schreibvorgaenge % self.aufraeumen == 0:
+                self._raeume_auf()
+
+    def _raeume_auf(self):
+        veraltet = list(self.veraltet)
+        if veraltet:
+            self._db.execute(
+                f"DELETE FROM antworten WHERE generation IN ({', '.join('?' * len(veraltet))})", veraltet
+            )
+            self.veraltet.difference_update(veraltet)
+        self._db.execute(
+            "DELETE FROM antworten WHERE schluessel IN "
+            "(SELECT schluessel FROM antworten ORDER BY zeit DESC LIMIT -1 OFFSET ?)",
+            (self.max_size,)
+        )
+
+
+class AntwortCache:
+    # LRU-Cache für fertige /chat-Antworten, Schlüssel ist die vereinheitlichte Frage.
+    # Jeder Eintrag trägt die Datengeneration (FAQ, Standort-Feed, Job-Sitemap), unter der er entstanden ist;
+    # ändert sich ein Teil, passen alte Einträge nicht mehr und werden verworfen.
+
+    def __init__(self, max_size=ANTWORT_CACHE_SIZE, pfad=ANTWORT_CACHE_DB):
+        self.max_size = max_size
+        self._eintraege = OrderedDict()  # Schlüssel -> (Generation, Antwort)
+        self._lock = threading.Lock()
+        self._teile = {}
+        self._teil_seit = {}  # Teil -> Zeitpunkt der letzten Änderung
+        self.generation = fingerabdruck(self._teile)
+        self._geteilt = _GeteilterSpeicher(pfad, max_size) if pfad else None
+        self.hits = 0
+        self.geteilte_hits = 0
+        self.misses = 0
+        self.invalidierungen = 0
+
+    def setze_generation(self, teil, wert):
+        with self._lock:
+            if self._teile.get(teil) == wert:
+                return
+            self._teile[teil] = wert
+            self._teil_seit[teil] = time.time()
+            alte = self.generation
+            self.generation = fingerabdruck(sorted(self._teile.items()))
+            if self._geteilt:
+                self._geteilt.veraltet.add(alte)
+                self._geteilt.veraltet.discard(self.generation)
+            self._eintraege.clear()
+            self.invalidierungen += 1
+
+    def generation_alter(self):
+        # Sekunden seit der letzten Änderung je Datenteil (faq, standorte, jobs)
+        jetzt = time.time()
+        with self._lock:
+            return {teil: jetzt - seit for teil, seit in self._teil_seit.items()}
+
+    def hole(self, schluessel):
+        generation, antwort = self._hole_lokal(schluessel)
+        return antwort if antwort is not None else self._hole_geteilt(schluessel, generation)
+
+    async def hole_async(self, schluessel):
+        # Wie hole; der Prozess-Cache direkt, die SQLite-Ebene in einem Thread statt auf der Event-Loop
+        generation, antwort = self._hole_lokal(schluessel)
+        if antwort is not None or self._geteilt is None:
+            return antwort if antwort is not None else self._hole_geteilt(schluessel, generation)
+        return await asyncio.to_thread(self._hole_geteilt, schluessel, generation)
+
+    def _hole_lokal(self, schluessel):
+        with self._lock:
+            generation = self.generation
+            eintrag = self._eintraege.get(schluessel)
+            if eintrag is not None and eintrag[0] == generation:
+                self._eintraege.move_to_end(schluessel)
+                self.hits += 1
+                return generation, eintrag[1]
+        return generation, None
+
+    def _hole_geteilt(self, schluessel, generation):
+        antwort = self._geteilt.hole(schluessel, generation) if self._geteilt else None
+        with self._lock:
+            if antwort is None:
+                self.misses += 1
+                return None
+            self.geteilte_hits += 1
+            self._ablegen(schluessel, generation, antwort)
+        return antwort
+
+    def speichere(self, schluessel, antwort, generation):
+        # generation: Stand beim Beginn der Berechnung; Antworten aus inzwischen ersetzten Daten werden verworfen
+        if self._speichere_lokal(schluessel, antwort, generation) and self._geteilt:
+            self._geteilt.speichere(schluessel, generation, antwort)
+
+    async def speichere_async(self, schluessel, antwort, generation):
+        if self._speichere_lokal(schluessel, antwort, generation) and self._geteilt:
+            await asyncio.to_thread(self._geteilt.speichere, schluessel, generation, antwort)
+
+    def _speichere_lokal(self, schluessel, antwort, generation):
+        with self._lock:
+            if generation != self.generation:
+                return False
+            self._ablegen(schluessel, generation, antwort)
+        return True
+
+    def _ablegen(self, schluessel, generation, antwort):
+        self._eintraege[schluessel] = (generation, antwort)
+        self._eintraege.move_to_end(schluessel)
+        while len(self._eintraege) > self.max_size:
+            self._eintraege.popitem(last=False)
+
+    def leeren(self):
+        with self._lock:
+            self._eintraege.clear()
+
+    def stats(self):
+        with self._lock:
+            treffer = self.hits + self.geteilte_hits
+            anfragen = treffer + self.misses
+            return {
+                "hits": self.hits,
+                "geteilte_hits": self.geteilte_hits,
+                "misses": self.misses,
+                "hit_rate": round(treffer / anfragen, 3) if anfragen else 0.0,
+                "size": len(self._eintraege),
+                "max_size": self.max_size,
+                "generation": self.generation,
+                "invalidierungen": self.invalidierungen,
+                "geteilt": self._geteilt is not None,
+            }
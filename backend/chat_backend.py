@@ -1,13 +1,29 @@
-from fastapi import FastAPI, Query
+from fastapi import FastAPI, HTTPException, Query, Response
 from fastapi.middleware.cors import CORSMiddleware
-from sentence_transformers import SentenceTransformer, util
-import requests
-import xml.etree.ElementTree as ET
+from pydantic import BaseModel, Field
 from rapidfuzz import fuzz, process
-from functools import lru_cache
-import os
-import re
+from fuzzy_engine import StandortScorer, BERUFS_BOOSTS
+from chat_engine import hole_engine, setze_torch_threads, faq_sicher, STUFE_DAUER
+from query_cache import QueryEmbeddingCache
+from antwort_cache import AntwortCache, fingerabdruck
+from encoder_batcher import MicroBatcher
+from executor import BoundedExecutor, Ueberlastet, CHAT_RETRY_AFTER, CHAT_BATCH_MAX, CHAT_BATCH_TIMEOUT
+from feed_refresher import FeedRefresher
+from feed_parser import oeffne_stream, parse_job_urls
+from standort_model import parse_standorte, WOCHENTAGE
+from geo_index import GeoIndex
+from job_katalog import JobKatalog
+from oeffnungszeiten import OeffnungszeitenTabelle, jetzt, TAGE_IN_FRAGE
+from keyword_automat import KeywordAutomat, KeywordTreffer
+from textnorm import tokenisiere, frage_schluessel
+from metriken import METRIKEN, Register
+from pipeline import Anfrage, Stufe, Pipeline, zwischenergebnis, KOSTEN_INDEX, KOSTEN_FUZZY, KOSTEN_ENCODER
+from datetime import datetime
+import numpy as np
+import asyncio
 import logging
+import threading
+import time
 
 app = FastAPI()
 app.add_middleware(
@@ -21,40 +37,66 @@ app.add_middleware(
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("chatbot")
 
-model = SentenceTransformer("all-MiniLM-L6-v2")
+# Dauer je /chat-Antwort (Stufen: STUFE_DAUER aus chat_engine); ein Lock + bisect pro Messung, bleibt dauerhaft an
+# Weg, auf dem eine FAQ-Suche entschieden wurde: bm25 (ohne Encoder), fusion (Encoder + BM25), lexikalisch (ohne Modell)
+FAQ_PFAD = METRIKEN.zaehler("chatbot_faq_pfad_total", "FAQ-Suchen nach Entscheidungsweg", ("pfad",))
+CHAT_DAUER = METRIKEN.histogramm(
+    "chatbot_chat_dauer_seconds", "Gesamtdauer einer /chat-Antwort nach Antworttyp und Antwort-Cache", ("typ", "cache")
+)
+
+# Modell und FAQ-Index kommen aus der gemeinsamen Engine (einmal pro Prozess). Standorte und Jobs liefern hier
+# die Feed-Refresher in eigene Indizes (StandortDaten, JobKatalog), deren Abgleich sich von chatbot.py
+# unterscheidet; die Standort- und Jobindizes der Engine bleiben im Backend deshalb leer.
+# Das Modell lädt erst nach dem Start im Hintergrund (lade_modell_im_hintergrund), bis dahin
+# laufen Öffnungszeiten, Standorte und Jobs normal und FAQ-Fragen lexikalisch.
+engine = hole_engine(standorte_xml=None, job_sitemap_url=None, modell_laden=False)
+MODEL_NAME = engine.model_name
+# Gleichzeitige /chat-Anfragen teilen sich einen Forward-Pass
+def encode_batch(texte):
+    with STUFE_DAUER.zeit("model_encode"):
+        return engine.model.encode(texte, convert_to_numpy=True)
+
+encoder = MicroBatcher(encode_batch)
+frage_cache = QueryEmbeddingCache(encoder.encode)
+
+# Encoder für engine.faq_suche; wird nur für Fragen ohne eindeutigen BM25-Treffer aufgerufen
+def encode_einzeln(fragen):
+    with STUFE_DAUER.zeit("encode"):
+        return [frage_cache.encode(frage) for frage in fragen]
+
+def encode_gebuendelt(fragen):
+    # /chat/batch: alle offenen Fragen in einem model.encode-Aufruf
+    with STUFE_DAUER.zeit("encode_batch"):
+        return engine.model.encode(fragen, convert_to_numpy=True)
+
+# Fertige Antworten je Frage; wird bei jeder Datenänderung (FAQ, Standorte, Jobs) ungültig
+antwort_cache = AntwortCache()
 
 STANDORT_XML_URL = "https://novotergum.de/wp-content/uploads/standorte-data.xml"
 JOB_SITEMAP_URL = "https://novotergum.de/novotergum_job-sitemap.xml"
 
-def lade_faq():
-    faq_dir = "faq"
-    daten = []
-    if not os.path.exists(faq_dir):
-        logger.warning("FAQ-Ordner fehlt.")
-        return daten
-    for datei in os.listdir(faq_dir):
-        if datei.endswith(".txt"):
-            with open(os.path.join(faq_dir, datei), "r", encoding="utf-8") as f:
-                frage, antwort = "", ""
-                for zeile in f:
-                    if zeile.startswith("Frage:"):
-                        frage = zeile.replace("Frage:", "").strip()
-                    elif zeile.startswith("Antwort:"):
-                        antwort = zeile.replace("Antwort:", "").strip()
-                        if frage and antwort:
-                            daten.append((frage, antwort))
-                            frage, antwort = "", ""
-    return daten
-
-faq_data = lade_faq()
-faq_questions = [f[0] for f in faq_data]
-faq_embeddings = model.encode(faq_questions, convert_to_tensor=True) if faq_questions else None
+def setze_faq_generation():
+    # Lexikalische und semantische FAQ-Antworten liegen in getrennten Generationen
+    faq_data, faq_index = engine.faq
+    modus = faq_index.modus if faq_index is not None else None
+    antwort_cache.setze_generation("faq", fingerabdruck((MODEL_NAME, faq_data, modus)))
+
+setze_faq_generation()
+# Neuer FAQ-Stand (Hot-Reload von faq/ oder Modell fertig geladen) → neue Generation
+engine.faq_beobachter.append(setze_faq_generation)
 
 standort_keywords = [
     "adresse", "wo ist", "standort", "zentrum", "praxis", "karte", "google maps",
     "telefon", "nummer", "anrufen", "sprechzeiten", "kontakt", "öffnungszeiten",
     "geöffnet", "offen"
 ]
+oeffnungs_keywords = [
+    "öffnungszeiten", "wann geöffnet", "wann offen", "wie lange offen",
+    "wann hat", "geöffnet", "offen", "wann macht", "wann ist auf", "betriebszeiten"
+]
+jetzt_keywords = ["jetzt", "gerade", "aktuell", "momentan", "im moment"]
+mehrzahl_keywords = ["welche", "zentren", "standorte", "praxen", "filialen"]
+naehe_keywords = ["nähe", "naehe", "nächste", "naechste", "umgebung", "um die ecke", "nahe bei mir"]
 job_keywords = ["job", "bewerbung", "karriere", "stellen", "stelle", "arbeiten", "arbeit", "position"]
 
 berufsfilter = {
@@ -86,13 +128,37 @@ berufsfilter = {
     ]
 }
 
-def bestimme_fragetyp(frage_lc: str):
-    def erste_position(keywords):
-        pos = [frage_lc.find(w) for w in keywords if w in frage_lc]
-        return min(pos) if pos else float('inf')
-
-    pos_standort = erste_position(standort_keywords)
-    pos_job = erste_position(job_keywords)
+# Alle Stichwortlisten in einem Automaten: jede Frage wird genau einmal durchlaufen,
+# egal wie viele Listen oder Begriffe dazukommen
+intent_automat = KeywordAutomat({
+    "standort": standort_keywords,
+    "job": job_keywords,
+    "öffnungszeiten": oeffnungs_keywords,
+    "jetzt": jetzt_keywords,
+    "mehrzahl": mehrzahl_keywords,
+    "nähe": naehe_keywords,
+    **{f"beruf:{k}": begriffe for k, begriffe in berufsfilter.items()},
+    **{f"kategorie:{k}": [k] for k in BERUFS_BOOSTS},
+    **{f"tag:{tag}": [w for w, t in TAGE_IN_FRAGE.items() if t == tag] for tag in set(TAGE_IN_FRAGE.values())},
+})
+
+@STUFE_DAUER.gemessen("intent")
+def analysiere_frage(frage: str) -> KeywordTreffer:
+    return intent_automat.scan(frage)
+
+def berufe_aus_treffer(treffer: KeywordTreffer):
+    return [k for k in berufsfilter if treffer.hat(f"beruf:{k}")]
+
+def kategorie_aus_treffer(treffer: KeywordTreffer):
+    return next((k for k in BERUFS_BOOSTS if treffer.hat(f"kategorie:{k}")), None)
+
+def tag_aus_treffer(treffer: KeywordTreffer):
+    tage = [int(g.split(":")[1]) for g in treffer.gruppen("tag:")]
+    return min(tage) if tage else None
+
+def bestimme_fragetyp(treffer: KeywordTreffer):
+    pos_standort = treffer.position("standort")
+    pos_job = treffer.position("job")
 
     if pos_standort < pos_job:
         return "standort"
@@ -103,278 +169,624 @@ def bestimme_fragetyp(frage_lc: str):
 
 def lade_standorte():
     try:
-        r = requests.get(STANDORT_XML_URL)
-        r.raise_for_status()
-        root = ET.fromstring(r.content)
-        standorte = []
-
-        for s in root.findall("standort"):
-            stadt_roh = s.findtext("stadt", "")
-            stadt = re.sub(r"\s*\(.*?\)", "", stadt_roh).strip()
-            adresse = f"{s.findtext('strasse', '')} {s.findtext('postleitzahl', '')}".strip()
-            telefon = s.findtext("telefon", "")
-            kategorie = s.findtext("primary_category", "").lower()
-            title = s.findtext("title", "").strip()
-            url = s.findtext("standort_url", "").strip()
-
-            # Öffnungszeiten vollständig extrahieren
-            zeiten_raw = []
-            zeiten_text = []
-            for h in s.findall(".//openingHoursSpecification/hours"):
-                tag = h.findtext("dayOfWeek", "")
-                von = h.findtext("opens", "")
-                bis = h.findtext("closes", "")
-                if tag and von and bis:
-                    zeiten_raw.append({
-                        "tag": tag,
-                        "von": von,
-                        "bis": bis
-                    })
-                    zeiten_text.append(f"{tag}: {von}–{bis}")
-
-            # Google Maps Link
-            maps = f"https://www.google.com/maps/search/?api=1&query={adresse.replace(' ', '+')},{stadt.replace(' ', '+')}"
-
-            # Slugteile aus URL
-            slugteile = []
-            if url:
-                slug_raw = url.rstrip("/").split("/")[-1]
-                slugteile = slug_raw.replace("-", " ").split()
-
-            # Aliases auf Basis von Stadt, Titel, Slug
-            aliases = list(set([
-                stadt.lower(),
-                stadt.lower().replace("-", " "),
-                title.lower(),
-                title.lower().replace("-", " ")
-            ] + slugteile))
-
-            # Leere Strings filtern
-            aliases = [a.strip() for a in aliases if a.strip()]
-
-            standorte.append({
-                "store_code": s.findtext("store_code", ""),
-                "stadt": stadt_roh.strip(),
-                "strasse": s.findtext("strasse", ""),
-                "postleitzahl": s.findtext("postleitzahl", ""),
-                "telefon": telefon,
-                "adresse": adresse,
-                "maps": maps,
-                "standort_url": url,
-                "opening_status": s.findtext("opening_status", ""),
-                "region_code": s.findtext("region_code", ""),
-                "language_code": s.findtext("language_code", ""),
-                "title": title,
-                "description": s.findtext("description", ""),
-                "primary_category": kategorie,
-                "geo": {
-                    "latitude": s.findtext("geo/latitude", ""),
-                    "longitude": s.findtext("geo/longitude", "")
-                },
-                "zeiten": " | ".join(zeiten_text) if zeiten_text else "Nicht verfügbar",
-                "zeiten_raw": zeiten_raw,
-                "title_lower": title.lower(),
-                "slugteile": slugteile,
-                "aliases": aliases
-            })
-
-        return standorte
+        with oeffne_stream(STANDORT_XML_URL) as stream:
+            return parse_standorte(stream)
     except Exception as e:
         logger.error(f"Fehler beim Laden der Standorte: {e}")
         return []
 
-standorte = []  # global
+def baue_standort_index(standorte):
+    index = {}
+    for i, s in enumerate(standorte):
+        # Kategorie mit im Index: reine Kategorie-Fragen ("Wo ist das Physiotherapiezentrum?") erreichen sonst
+        # den Fuzzy-Scorer nicht, der die Kategorie mitbewertet
+        quellen = s.aliases + s.slugteile + (s.stadt, s.postleitzahl, s.title_lower, s.primary_category)
+        for text in quellen:
+            for token in tokenisiere(text):
+                index.setdefault(token, set()).add(i)
+    return index
+
+class StandortDaten:
+    # Schnappschuss aus Standortliste und allen daraus abgeleiteten Indizes.
+    # Wird komplett neu gebaut und dann als Ganzes ausgetauscht, nie in-place verändert.
+    def __init__(self, standorte):
+        self.standorte = standorte
+        self.index = baue_standort_index(standorte)  # Token -> Set von Positionen in `standorte`
+        self.vokabular = list(self.index.keys())  # alle Index-Tokens für Tippfehler-Lookups
+        self.scorer = StandortScorer(standorte)
+        self.geo = GeoIndex((i, s.latitude, s.longitude) for i, s in enumerate(standorte))
+        self.zeiten = OeffnungszeitenTabelle(standorte)
+        # Stadt je Standort in Token-Schreibweise ("nieder olm", "muelheim an der ruhr")
+        self.stadt_tokens = np.array([" ".join(tokenisiere(s.stadt_bereinigt)) for s in standorte], dtype=str)
+        self.staedte = sorted(set(self.stadt_tokens.tolist()) - {""})
+
+standort_daten = StandortDaten([])  # global
+
+def setze_standorte(standorte):
+    global standort_daten
+    standort_daten = StandortDaten(standorte)
+    antwort_cache.setze_generation("standorte", fingerabdruck(standorte))
+    logger.info(f"{len(standorte)} Standorte erfolgreich geladen ({len(standort_daten.index)} Index-Tokens).")
+
+def standort_shortlist(frage_clean: str, daten: StandortDaten):
+    # Nur Standorte, die mindestens ein Token mit der Frage teilen, bekommen den teuren Fuzzy-Score.
+    # Unbekannte Tokens werden gegen das (kleine) Index-Vokabular fuzzy nachgeschlagen, damit Tippfehler
+    # wie "düseldorf" weiterhin treffen.
+    ids = set()
+    for token in tokenisiere(frage_clean):
+        treffer = daten.index.get(token)
+        if treffer:
+            ids |= treffer
+        elif len(token) >= 4:
+            for wort, _, _ in process.extract(token, daten.vokabular, scorer=fuzz.ratio, score_cutoff=80, limit=5):
+                ids |= daten.index[wort]
+    return sorted(ids)
+
+@STUFE_DAUER.gemessen("standort")
+def finde_standort_id(frage: str, daten: StandortDaten, shortlist=None):
+    frage_clean = frage.lower().replace("-", " ").replace(",", " ").strip()
+    if shortlist is None:
+        shortlist = standort_shortlist(frage_clean, daten)
+
+    # Bewertung (token_set_ratio + Titel-, Alias- und Berufs-Boosts) als ein cdist-Aufruf über die Shortlist
+    best = daten.scorer.bester(frage, ids=shortlist, schwelle=70)
+
+    if best is None:
+        logger.warning(f"Kein Standort-Match für: {frage_clean}")
+    return best
+
+@STUFE_DAUER.gemessen("standort_batch")
+def finde_standort_ids(fragen, daten: StandortDaten, shortlists=None):
+    # Batch-Variante von finde_standort_id: eine Score-Matrix über die Vereinigung aller Shortlists,
+    # danach wählt jede Frage nur unter ihren eigenen Kandidaten
+    fragen_clean = [f.lower().replace("-", " ").replace(",", " ").strip() for f in fragen]
+    if shortlists is None:
+        shortlists = [standort_shortlist(f, daten) for f in fragen_clean]
+    ids, matrix = daten.scorer.scores_batch(fragen, sorted(set().union(*shortlists)))
+    spalte = {int(id): j for j, id in enumerate(ids)}
+
+    ergebnis = []
+    for frage_clean, shortlist, zeile in zip(fragen_clean, shortlists, matrix):
+        best = daten.scorer.waehle(shortlist, zeile[[spalte[i] for i in shortlist]], schwelle=70)
+        if best is None:
+            logger.warning(f"Kein Standort-Match für: {frage_clean}")
+        ergebnis.append(best)
+    return ergebnis
+
+def finde_passenden_standort(frage: str):
+    daten = standort_daten
+    best = finde_standort_id(frage, daten)
+    return daten.standorte[best] if best is not None else None
+
+def staedte_in_frage(frage: str, daten: StandortDaten):
+    text = f" {' '.join(tokenisiere(frage))} "
+    return [stadt for stadt in daten.staedte if f" {stadt} " in text]
+
+def finde_offene_standorte(daten: StandortDaten, tag: int = None, zeitpunkt: datetime = None, staedte=None, kategorie: str = None):
+    # Ein Spaltenzugriff auf die Öffnungszeiten-Bitmap statt Parsen pro Standort
+    maske = daten.zeiten.offen_am(tag) if tag is not None else daten.zeiten.offen_um(zeitpunkt or jetzt())
+    if staedte:
+        maske = maske & np.isin(daten.stadt_tokens, staedte)
+    treffer = [daten.standorte[i] for i in np.flatnonzero(maske)]
+    if kategorie:
+        treffer = [s for s in treffer if kategorie.lower() in s.primary_category]
+    return treffer
+
+def finde_naechste_standorte(lat: float, lon: float, k: int = 3, kategorie: str = None):
+    daten = standort_daten
+    filter = None
+    if kategorie:
+        kategorie = kategorie.lower()
+        filter = lambda i: kategorie in daten.standorte[i].primary_category
+    return [(daten.standorte[i], km) for i, km in daten.geo.naechste(lat, lon, k, filter)]
+
+def lade_job_urls():
+    try:
+        with oeffne_stream(JOB_SITEMAP_URL) as stream:
+            return parse_job_urls(stream)
+    except Exception as e:
+        logger.error(f"Fehler beim Laden der Job-URLs: {e}")
+        return {}
+
+def baue_job_katalog(job_urls):
+    # Schnappschuss der Job-Sitemap: Titel, Orts- und Berufsindex werden hier einmal berechnet
+    return JobKatalog(job_urls, berufsfilter, titel=extrahiere_jobtitel)
+
+job_daten = JobKatalog({}, berufsfilter)  # global
+
+def setze_job_urls(job_urls):
+    global job_daten
+    job_daten = baue_job_katalog(job_urls)
+    antwort_cache.setze_generation("jobs", fingerabdruck(job_urls))
+    logger.info(f"{sum(len(v) for v in job_urls.values())} Job-URLs für {len(job_urls)} Orte geladen.")
+
+def lade_job_urls_cached():
+    # Aktueller Stand der Job-Sitemap; wird im Hintergrund aktualisiert statt beim ersten Aufruf geladen
+    return job_daten.job_urls
+
+standort_refresher = FeedRefresher("Standorte", STANDORT_XML_URL, parse_standorte, setze_standorte)
+job_refresher = FeedRefresher("Job-Sitemap", JOB_SITEMAP_URL, parse_job_urls, setze_job_urls)
+
+def lade_modell_im_hintergrund():
+    threading.Thread(target=engine.lade_modell, name="modell-laden", daemon=True).start()
+
+def vorladen():
+    # Preload-Modus (gunicorn.conf.py): Modell, FAQ-Index und Feeds einmal im Master laden. Die Worker erben
+    # alles per fork und teilen sich die Speicherseiten, solange sie nur lesen (copy-on-write).
+    # Torch läuft im Master mit nur einem Thread: OpenMP-/Intra-op-Thread-Pools überleben fork() nicht, und
+    # Worker, die einen geerbten Pool benutzen, können beim ersten encode hängen bleiben.
+    setze_torch_threads(1)
+    engine.lade_modell()
+    standort_refresher.fetch_once()
+    job_refresher.fetch_once()
+
+def nach_fork(threads):
+    # Im Worker direkt nach fork: eigene Torch-Threads, dann der erste Forward-Pass hier statt in der ersten Anfrage
+    setze_torch_threads(threads)
+    if engine.modell_bereit.is_set():
+        engine.model.encode(["Aufwärmen"], convert_to_numpy=True)
 
 @app.on_event("startup")
 def init_standorte():
-    global standorte
-    standorte = lade_standorte()
-    logger.info(f"{len(standorte)} Standorte erfolgreich geladen.")
+    lade_modell_im_hintergrund()
+    # Der erste Abruf läuft auf den Refresher-Threads, der Start wartet nicht auf die Feeds; bis dahin meldet
+    # /healthz Standorte bzw. Jobs als nicht bereit. Im Preload-Modus sind die Feeds schon da.
+    standort_refresher.start()
+    job_refresher.start()
+    engine.faq_watcher.start()
+
+@app.on_event("shutdown")
+def stoppe_refresher():
+    standort_refresher.stop()
+    job_refresher.stop()
+    engine.faq_watcher.stop()
+
+@STUFE_DAUER.gemessen("jobs")
+def finde_jobs_fuer_ort(frage, treffer: KeywordTreffer = None):
+    # Ort per Fuzzy-Match, Berufe per Stichwort; Ergebnis ist eine Schnittmenge der Indizes
+    berufe = berufe_aus_treffer(treffer) if treffer is not None else None
+    return job_daten.suche(frage, berufe)
 
-def finde_passenden_standort(frage: str):
-    frage_lc = frage.lower()
-    frage_clean = frage_lc.replace("-", " ").replace(",", " ").strip()
-    kandidaten = []
-
-    for s in standorte:
-        # Basistext für Fuzzy-Matching
-        felder = [
-            s.get("stadt", ""),
-            s.get("adresse", ""),
-            s.get("title", ""),  # ✅ Korrektur: vorher 'name'
-            s.get("primary_category", "")
-        ]
-        suchtext = " ".join(felder).lower().replace("-", " ")
-        score = fuzz.token_set_ratio(frage_clean, suchtext)
+def extrahiere_jobtitel(url):
+    slug = url.rstrip("/").split("/")[-1]
+    teile = [t for t in slug.split("-") if not t.isdigit()]
+    blacklist = {"m", "w", "d", "in"}
+    return " ".join(t.capitalize() for t in teile if t not in blacklist)
 
-        # Boosts
-        boost = 0
+# CPU-Stufen laufen auf eigenem, begrenztem Pool statt im Starlette-Threadpool
+chat_executor = BoundedExecutor()
 
-        # 1. Titel-Kompletttreffer
-        title = s.get("title", "")
-        if all(w in title.lower() for w in frage_clean.split()):
-            boost += 10
+async def im_executor(fn, *args, timeout=None):
+    try:
+        return await chat_executor.run(fn, *args, timeout=timeout)
+    except Ueberlastet:
+        raise HTTPException(
+            status_code=503,
+            detail="Der Chatbot ist gerade ausgelastet. Bitte versuche es gleich noch einmal.",
+            headers={"Retry-After": str(CHAT_RETRY_AFTER)}
+        )
+    except asyncio.TimeoutError:
+        raise HTTPException(
+            status_code=504,
+            detail="Die Antwort hat zu lange gedauert. Bitte versuche es gleich noch einmal.",
+            headers={"Retry-After": str(CHAT_RETRY_AFTER)}
+        )
+
+def ist_cachebar(antwort):
+    # "Jetzt geöffnet" hängt von der Uhrzeit ab, Nähe-Antworten von den Koordinaten – nicht nur von den Daten
+    if antwort["typ"] == "standort_naehe" or "jetzt_geoeffnet" in antwort:
+        return False
+    return not (antwort["typ"] == "öffnungszeiten_liste" and antwort["tag"] is None)
 
-        # 2. Alias-Treffer
-        aliases = s.get("aliases", [])
-        if any(alias in frage_clean for alias in aliases):
-            boost += 15
+@app.get("/chat")
+async def chat(
+    frage: str = Query(...),
+    lat: float = Query(None, ge=-90, le=90),
+    lon: float = Query(None, ge=-180, le=180)
+):
+    start = time.perf_counter()
+    anfrage = ChatAnfrage(" ".join(frage.split()), lat, lon)
+    # Mit Koordinaten und Nähe-Frage hängt die Antwort vom Ort ab: am Cache vorbei
+    schluessel = None
+    if lat is None or lon is None or not anfrage.stichworte.hat("nähe"):
+        schluessel = frage_schluessel(anfrage.frage)
+        antwort = await antwort_cache.hole_async(schluessel)
+        if antwort is not None:
+            CHAT_DAUER.beobachte(time.perf_counter() - start, antwort["typ"], "hit")
+            return antwort
+
+    generation = antwort_cache.generation
+    antwort = await im_executor(beantworte_anfrage, anfrage)
+    if schluessel and ist_cachebar(antwort):
+        await antwort_cache.speichere_async(schluessel, antwort, generation)
+    CHAT_DAUER.beobachte(time.perf_counter() - start, antwort["typ"], "miss" if schluessel else "aus")
+    return antwort
+
+class ChatBatchAnfrage(BaseModel):
+    fragen: list[str] = Field(..., min_length=1, max_length=CHAT_BATCH_MAX)
+
+@app.post("/chat/batch")
+async def chat_batch(anfrage: ChatBatchAnfrage):
+    # Antworten in derselben Form wie /chat, in der Reihenfolge der Fragen; gecachte Fragen werden übersprungen
+    fragen = [" ".join(f.split()) for f in anfrage.fragen]
+    schluessel = [frage_schluessel(f) for f in fragen]
+    antworten = [await antwort_cache.hole_async(k) for k in schluessel]
+
+    offen = [i for i, antwort in enumerate(antworten) if antwort is None]
+    if offen:
+        generation = antwort_cache.generation
+        neu = await im_executor(beantworte_fragen, [fragen[i] for i in offen], timeout=CHAT_BATCH_TIMEOUT)
+        for i, antwort in zip(offen, neu):
+            antworten[i] = antwort
+            if ist_cachebar(antwort):
+                await antwort_cache.speichere_async(schluessel[i], antwort, generation)
+    return {"anzahl": len(antworten), "antworten": antworten}
+
+# Werte, die erst beim Abruf von /metrics gelesen werden
+def _cache_anfragen():
+    a, f = antwort_cache.stats(), frage_cache.stats()
+    return {
+        ("antwort", "hit"): a["hits"], ("antwort", "geteilt"): a["geteilte_hits"], ("antwort", "miss"): a["misses"],
+        ("frage", "hit"): f["hits"], ("frage", "miss"): f["misses"],
+    }
 
-        # 3. Berufs-Keywords
-        if "ergo" in frage_lc and "ergo" in suchtext:
-            boost += 10
-        if "physio" in frage_lc and "physio" in suchtext:
-            boost += 10
-        if "logo" in frage_lc and "logo" in suchtext:
-            boost += 10
+METRIKEN.abfrage("chatbot_cache_anfragen_total", "Cache-Zugriffe nach Ergebnis", _cache_anfragen, ("cache", "ergebnis"), "counter")
+METRIKEN.abfrage(
+    "chatbot_cache_hit_ratio", "Trefferquote seit Prozessstart",
+    lambda: {("antwort",): antwort_cache.stats()["hit_rate"], ("frage",): frage_cache.stats()["hit_rate"]}, ("cache",)
+)
+METRIKEN.abfrage(
+    "chatbot_cache_eintraege", "Einträge im Cache",
+    lambda: {("antwort",): antwort_cache.stats()["size"], ("frage",): frage_cache.stats()["size"]}, ("cache",)
+)
+METRIKEN.abfrage(
+    "chatbot_daten_alter_seconds", "Sekunden seit der letzten Änderung der Datengeneration",
+    lambda: {(teil,): alter for teil, alter in antwort_cache.generation_alter().items()}, ("daten",)
+)
+METRIKEN.abfrage(
+    "chatbot_feed_abruf_alter_seconds", "Sekunden seit dem letzten erfolgreichen Abruf (auch 304)",
+    lambda: {
+        (r.name,): time.time() - r.geladen_um if r.geladen_um else None for r in (standort_refresher, job_refresher)
+    },
+    ("feed",)
+)
+METRIKEN.abfrage("chatbot_executor_in_arbeit", "Laufende und wartende /chat-Aufgaben", lambda: chat_executor.stats()["in_arbeit"])
+METRIKEN.abfrage(
+    "chatbot_executor_abgelehnt_total", "Mit 503 abgelehnte Anfragen", lambda: chat_executor.stats()["abgelehnt"], typ="counter"
+)
+METRIKEN.abfrage(
+    "chatbot_executor_timeouts_total", "Mit 504 abgebrochene Anfragen",
+    lambda: chat_executor.stats()["zeitueberschreitungen"], typ="counter"
+)
+METRIKEN.abfrage("chatbot_encoder_batches_total", "Gebündelte model.encode-Aufrufe", lambda: encoder.batches, typ="counter")
+METRIKEN.abfrage("chatbot_encoder_items_total", "Über den Micro-Batcher encodierte Fragen", lambda: encoder.items, typ="counter")
 
-        # Gesamt-Score
-        score += boost
+def komponenten():
+    # Bereitschaft je Komponente; Öffnungszeiten und Standorte hängen am Standort-Feed, Jobs an der Sitemap
+    faq_data, faq_index = engine.faq
+    return {
+        "standorte": {"bereit": standort_refresher.geladen_um is not None, "anzahl": len(standort_daten.standorte)},
+        "jobs": {"bereit": job_refresher.geladen_um is not None, "anzahl": len(job_daten.jobs)},
+        "modell": {
+            "bereit": engine.modell_bereit.is_set(),
+            "name": MODEL_NAME,
+            "ladezeit_s": round(engine.modell_ladezeit_s, 1) if engine.modell_ladezeit_s is not None else None,
+            "fehler": engine.modell_fehler,
+        },
+        "faq": {
+            "bereit": faq_index is not None or not faq_data,
+            "anzahl": len(faq_data),
+            "modus": "semantisch" if faq_index is not None else "lexikalisch",
+        },
+    }
 
-        if score > 70:
-            kandidaten.append((s, score))
+METRIKEN.abfrage(
+    "chatbot_komponente_bereit", "1, sobald die Komponente mit vollem Funktionsumfang antwortet",
+    lambda: {(name,): int(k["bereit"]) for name, k in komponenten().items()}, ("komponente",)
+)
 
-    kandidaten.sort(key=lambda x: x[1], reverse=True)
+@app.get("/healthz")
+def healthz():
+    # 200, sobald der Prozess Anfragen annimmt; "bereit" ist erst true, wenn alle Komponenten geladen sind
+    k = komponenten()
+    return {"status": "ok", "bereit": all(v["bereit"] for v in k.values()), "komponenten": k}
 
-    if not kandidaten:
-        logger.warning(f"Kein Standort-Match für: {frage_clean}")
-        return None
+@app.get("/metrics")
+def metrics():
+    return Response(METRIKEN.text(), media_type=Register.CONTENT_TYPE)
 
-    return kandidaten[0][0]
+@app.get("/stats")
+def stats():
+    faq_index = engine.faq[1]
+    return {
+        "antwort_cache": antwort_cache.stats(),
+        "frage_cache": frage_cache.stats(),
+        "faq_index": faq_index.stats() if faq_index is not None else None,
+        "faq_bm25": engine.faq_bm25.stats(),
+        "encoder": encoder.stats(),
+        "executor": chat_executor.stats(),
+        "feeds": {r.name: r.status() for r in (standort_refresher, job_refresher)},
+        "faq": engine.faq_watcher.status(),
+        "pipeline": chat_pipeline.stats(),
+    }
 
-@lru_cache(maxsize=1)
-def lade_job_urls_cached():
-    try:
-        r = requests.get(JOB_SITEMAP_URL)
-        r.raise_for_status()
-        root = ET.fromstring(r.content)
-        job_urls = {}
-        for url_node in root.findall(".//{http://www.sitemaps.org/schemas/sitemap/0.9}url"):
-            loc = url_node.find("{http://www.sitemaps.org/schemas/sitemap/0.9}loc")
-            if loc is not None:
-                url = loc.text.strip()
-                slug = url.rstrip("/").split("/")[-1]
-                if slug == "jobs":
-                    continue
-                teile = slug.split("-")
-                if teile:
-                    ort = teile[-1].lower()
-                    job_urls.setdefault(ort, []).append(url)
-        return job_urls
-    except Exception as e:
-        logger.error(f"Fehler beim Laden der Job-URLs: {e}")
-        return {}
+@app.get("/standorte/nearest")
+def naechste_standorte(
+    lat: float = Query(..., ge=-90, le=90),
+    lon: float = Query(..., ge=-180, le=180),
+    k: int = Query(3, ge=1, le=50),
+    kategorie: str = Query(None)
+):
+    treffer = finde_naechste_standorte(lat, lon, k, kategorie)
+    return {
+        "anzahl": len(treffer),
+        "standorte": [{**standort_felder(s), "entfernung_km": round(km, 1)} for s, km in treffer]
+    }
 
-def finde_jobs_fuer_ort(frage):
-    frage_lower = frage.lower()
-    job_urls = lade_job_urls_cached()
-    orte = list(job_urls.keys())
+@app.get("/standorte/open")
+def offene_standorte(
+    at: datetime = Query(None),
+    stadt: str = Query(None),
+    kategorie: str = Query(None)
+):
+    daten = standort_daten
+    zeitpunkt = at or jetzt()
+    staedte = [" ".join(tokenisiere(stadt))] if stadt else None
+    treffer = finde_offene_standorte(daten, zeitpunkt=zeitpunkt, staedte=staedte, kategorie=kategorie)
+    return {
+        "zeitpunkt": zeitpunkt.isoformat(),
+        "anzahl": len(treffer),
+        "standorte": [standort_felder(s) for s in treffer]
+    }
 
-    bester_ort, score, _ = process.extractOne(frage_lower, orte, scorer=fuzz.partial_ratio)
-    if score >= 80:
-        urls = job_urls[bester_ort]
+@app.get("/jobs")
+def jobs(
+    ort: str = Query(None),
+    beruf: str = Query(None),
+    offset: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=100)
+):
+    katalog = job_daten
+    ort_key = None
+    if ort:
+        ort_key = ort.lower() if ort.lower() in katalog.nach_ort else katalog.ort_in_frage(ort)
+    berufe = []
+    if beruf:
+        berufe = [beruf.lower()] if beruf.lower() in katalog.nach_beruf else katalog.berufe_in_frage(beruf)
+    if (ort and ort_key is None) or (beruf and not berufe):
+        treffer = []
     else:
-        urls = [u for jobliste in job_urls.values() for u in jobliste]
+        treffer = katalog.filter(ort_key, berufe)
+    return {
+        "anzahl": len(treffer),
+        "offset": offset,
+        "limit": limit,
+        "jobs": [
+            {"url": j.url, "titel": j.titel, "ort": j.ort, "berufe": sorted(j.berufe)}
+            for j in treffer[offset:offset + limit]
+        ]
+    }
 
-    relevante_keys = [k for k, terms in berufsfilter.items() if any(term in frage_lower for term in terms)]
+def standort_felder(standort):
+    return {
+        "zentrum": standort.title,
+        "stadt": standort.stadt,
+        "adresse": standort.adresse,
+        "telefon": standort.telefon,
+        "maps": standort.maps,
+        "standort_url": standort.standort_url,
+        "zeiten": standort.zeiten_raw
+    }
 
-    if relevante_keys:
-        urls = [
-            u for u in urls
-            if any(any(term in u.lower() for term in berufsfilter[k]) for k in relevante_keys)
-        ]
+def standort_antwort(typ, standort, hinweis):
+    return {"typ": typ, **standort_felder(standort), "hinweis": hinweis}
 
-    return urls
+def naehe_antwort(stichworte: KeywordTreffer, lat: float = None, lon: float = None):
+    # 0. "In meiner Nähe" mit Koordinaten vom Widget
+    if lat is None or lon is None or not stichworte.hat("nähe"):
+        return None
+    kategorie = kategorie_aus_treffer(stichworte)
+    treffer = finde_naechste_standorte(lat, lon, 3, kategorie)
+    if not treffer:
+        return None
+    return {
+        "typ": "standort_naehe",
+        "standorte": [{**standort_felder(s), "entfernung_km": round(km, 1)} for s, km in treffer],
+        "hinweis": "Nächstgelegene Zentren zu deinem Standort"
+    }
 
-def extrahiere_jobtitel(url):
-    slug = url.rstrip("/").split("/")[-1]
-    teile = [t for t in slug.split("-") if not t.isdigit()]
-    blacklist = {"m", "w", "d", "in"}
-    return " ".join(t.capitalize() for t in teile if t not in blacklist)
+def faq_antwort(faq_data, treffer):
+    # 5. Fallback auf FAQ; bester Treffer aus engine.faq_suche (BM25 eindeutig oder Kosinus, BM25 nur im Rang)
+    ids, scores, modus = treffer
+    FAQ_PFAD.erhoehe(modus)
+    if not faq_sicher(scores, modus):
+        return None
+    antwort = {
+        "typ": "faq",
+        "frage": faq_data[ids[0]][0],
+        "antwort": faq_data[ids[0]][1],
+        "score": round(scores[0], 3),
+        "modus": modus,
+    }
+    if modus == "bm25":
+        # "score" bleibt der Kosinus-Skala vorbehalten; ohne Encoder gibt es keinen, der BM25-Score steht extra
+        antwort["score"] = None
+        antwort["bm25"] = round(scores[0], 3)
+    return antwort
+
+def faq_antwort_lexikalisch(frage):
+    # 5. FAQ ohne Modell (solange es noch lädt) und ohne eindeutigen BM25-Treffer: ähnlichste FAQ-Frage per token_sort_ratio
+    FAQ_PFAD.erhoehe("lexikalisch")
+    faq_data, idx, score = engine.faq_lexikalisch(frage)
+    if idx is None:
+        return None
+    return {
+        "typ": "faq",
+        "frage": faq_data[idx][0],
+        "antwort": faq_data[idx][1],
+        "score": round(score, 3),
+        "modus": "lexikalisch",
+    }
 
-@app.get("/chat")
-def chat(frage: str = Query(...)):
-    frage_lc = frage.lower()
-    typ_prioritaet = bestimme_fragetyp(frage_lc)
-    standort = finde_passenden_standort(frage)
+def keine_antwort():
+    # 6. Nichts gefunden
+    return {
+        "typ": "unbekannt",
+        "antwort": "Ich konnte leider nichts Passendes finden."
+    }
 
+class ChatAnfrage(Anfrage):
+    # Zwischenergebnisse einer Frage; jedes wird erst berechnet, wenn eine Stufe es braucht, und dann geteilt.
+    # daten: Standort-Schnappschuss, mit dem die ganze Anfrage arbeitet
+
+    def __init__(self, frage: str, lat: float = None, lon: float = None, daten: StandortDaten = None):
+        super().__init__(frage)
+        self.lat = lat
+        self.lon = lon
+        self.daten = daten or standort_daten
+
+    @zwischenergebnis
+    def stichworte(self) -> KeywordTreffer:
+        return analysiere_frage(self.frage)
+
+    @zwischenergebnis
+    def fragetyp(self):
+        return bestimme_fragetyp(self.stichworte)
+
+    @zwischenergebnis
+    def frage_clean(self):
+        return self.frage.lower().replace("-", " ").replace(",", " ").strip()
+
+    @zwischenergebnis
+    def shortlist(self):
+        # Standorte mit mindestens einem gemeinsamen (oder fast gleichen) Token; leer → kein Standort möglich
+        return standort_shortlist(self.frage_clean, self.daten)
+
+    @zwischenergebnis
+    def best(self):
+        return finde_standort_id(self.frage, self.daten, self.shortlist) if self.shortlist else None
+
+    @zwischenergebnis
+    def standort(self):
+        return self.daten.standorte[self.best] if self.best is not None else None
+
+    @zwischenergebnis
+    def faq(self):
+        # (faq_data, (ids, scores, modus)); Encoder nur ohne eindeutigen BM25-Treffer
+        with STUFE_DAUER.zeit("faq"):
+            faq_data, [treffer] = engine.faq_suche([self.frage], encode=encode_einzeln)
+        return faq_data, treffer
+
+def standorte_vorab(anfragen):
+    # Stapelbetrieb: Standort-Scores aller Anfragen, die einen brauchen, als eine Matrix
+    offen = [a for a in anfragen if a.shortlist and not a.berechnet("best")]
+    if offen:
+        bests = finde_standort_ids([a.frage for a in offen], offen[0].daten, [a.shortlist for a in offen])
+        for anfrage, best in zip(offen, bests):
+            anfrage.setze("best", best)
+
+def ist_oeffnungszeiten_liste(anfrage: ChatAnfrage):
+    # "Welche Zentren in Düsseldorf haben samstags offen?" / "Welche haben jetzt offen?"
+    stichworte = anfrage.stichworte
+    return (tag_aus_treffer(stichworte) is not None or stichworte.hat("jetzt")) and stichworte.hat("mehrzahl")
+
+def naehe_stufe(anfrage: ChatAnfrage):
+    return naehe_antwort(anfrage.stichworte, anfrage.lat, anfrage.lon)
+
+def oeffnungszeiten_antwort(anfrage: ChatAnfrage):
     # 1. Öffnungszeiten explizit behandeln (inkl. Synonyme)
-    if any(kw in frage_lc for kw in [
-        "öffnungszeiten", "wann geöffnet", "wann offen", "wie lange offen",
-        "wann hat", "geöffnet", "offen", "wann macht", "wann ist auf", "betriebszeiten"
-    ]):
-        if standort:
-            return {
-                "typ": "öffnungszeiten",
-                "zentrum": standort.get("title"),
-                "stadt": standort.get("stadt"),
-                "adresse": standort.get("adresse"),
-                "telefon": standort.get("telefon"),
-                "maps": standort.get("maps"),
-                "standort_url": standort.get("standort_url"),
-                "zeiten": standort.get("zeiten_raw", []),
-                "hinweis": "Öffnungszeiten direkt aus Standortdaten"
-            }
-        else:
-            return {
-                "typ": "faq",
-                "antwort": "Die Öffnungszeiten variieren je nach Zentrum. Bitte schau auf der jeweiligen [Standortseite](https://www.novotergum.de/standorte/) nach."
-            }
-
-    # 2. Jobs explizit behandeln
-    if typ_prioritaet == "job":
-        jobs = finde_jobs_fuer_ort(frage)
-        if jobs:
-            return {
-                "typ": "job",
-                "anzahl": len(jobs),
-                "jobs": [{"url": j, "titel": extrahiere_jobtitel(j)} for j in jobs[:5]],
-            }
-
-    # 3. Standortdetails direkt (z. B. Adresse, Telefon)
-    if typ_prioritaet == "standort" and standort:
+    stichworte, daten = anfrage.stichworte, anfrage.daten
+    jetzt_gefragt = stichworte.hat("jetzt")
+    tag = tag_aus_treffer(stichworte)
+
+    # 1a. Mehrere Zentren, ohne einen bestimmten Standort zu suchen
+    if ist_oeffnungszeiten_liste(anfrage):
+        kategorie = kategorie_aus_treffer(stichworte)
+        treffer = finde_offene_standorte(daten, tag=tag, staedte=staedte_in_frage(anfrage.frage, daten), kategorie=kategorie)
         return {
-            "typ": "standort",
-            "zentrum": standort.get("title"),
-            "stadt": standort.get("stadt"),
-            "adresse": standort.get("adresse"),
-            "telefon": standort.get("telefon"),
-            "maps": standort.get("maps"),
-            "standort_url": standort.get("standort_url"),
-            "zeiten": standort.get("zeiten_raw", []),
-            "hinweis": "Standortdetails direkt gematcht"
+            "typ": "öffnungszeiten_liste",
+            "tag": WOCHENTAGE[tag] if tag is not None else None,
+            "anzahl": len(treffer),
+            "standorte": [standort_felder(s) for s in treffer],
+            "hinweis": "Geöffnete Zentren laut Standortdaten"
         }
 
-    # 4. Standort trotzdem zurückgeben, falls erkannt
-    if standort:
+    if anfrage.standort:
+        antwort = standort_antwort("öffnungszeiten", anfrage.standort, "Öffnungszeiten direkt aus Standortdaten")
+        antwort["jetzt_geoeffnet"] = daten.zeiten.ist_offen(anfrage.best, jetzt())
+        if jetzt_gefragt:
+            antwort["hinweis"] = "Jetzt geöffnet" if antwort["jetzt_geoeffnet"] else "Gerade geschlossen"
+        return antwort
+    return {
+        "typ": "faq",
+        "antwort": "Die Öffnungszeiten variieren je nach Zentrum. Bitte schau auf der jeweiligen [Standortseite](https://www.novotergum.de/standorte/) nach."
+    }
+
+def job_antwort(anfrage: ChatAnfrage):
+    # 2. Jobs explizit behandeln
+    jobs = finde_jobs_fuer_ort(anfrage.frage, anfrage.stichworte)
+    if jobs:
         return {
-            "typ": "standort",
-            "zentrum": standort.get("title"),
-            "stadt": standort.get("stadt"),
-            "adresse": standort.get("adresse"),
-            "telefon": standort.get("telefon"),
-            "maps": standort.get("maps"),
-            "standort_url": standort.get("standort_url"),
-            "zeiten": standort.get("zeiten_raw", []),
-            "hinweis": "Standort erkannt, aber nicht priorisiert"
+            "typ": "job",
+            "anzahl": len(jobs),
+            "jobs": [{"url": j.url, "titel": j.titel} for j in jobs[:5]],
         }
+    return None
 
-    # 5. Fallback auf FAQ
-    if faq_embeddings is not None:
-        frage_embedding = model.encode(frage, convert_to_tensor=True)
-        scores = util.cos_sim(frage_embedding, faq_embeddings)
-        best_idx = scores[0].argmax().item()
-        best_score = scores[0][best_idx].item()
-        if best_score > 0.6:
-            return {
-                "typ": "faq",
-                "frage": faq_data[best_idx][0],
-                "antwort": faq_data[best_idx][1],
-                "score": round(best_score, 3),
-            }
+def standort_stufe(anfrage: ChatAnfrage):
+    # 3. Standortdetails direkt (z. B. Adresse, Telefon)
+    if anfrage.standort:
+        return standort_antwort("standort", anfrage.standort, "Standortdetails direkt gematcht")
+    return None
 
-    # 6. Nichts gefunden
-    return {
-        "typ": "unbekannt",
-        "antwort": "Ich konnte leider nichts Passendes finden."
-    }
+def standort_erkannt_stufe(anfrage: ChatAnfrage):
+    # 4. Standort trotzdem zurückgeben, falls erkannt
+    if anfrage.standort:
+        return standort_antwort("standort", anfrage.standort, "Standort erkannt, aber nicht priorisiert")
+    return None
+
+def faq_stufe(anfrage: ChatAnfrage):
+    faq_data, treffer = anfrage.faq
+    if treffer[2] is not None:
+        return faq_antwort(faq_data, treffer)
+    with STUFE_DAUER.zeit("faq_lexikalisch"):
+        return faq_antwort_lexikalisch(anfrage.frage)
+
+def faq_vorab(anfragen):
+    # Stapelbetrieb: alle FAQ-Kandidaten ohne eindeutigen BM25-Treffer in einem model.encode-Aufruf
+    with STUFE_DAUER.zeit("faq_batch"):
+        faq_data, treffer = engine.faq_suche([a.frage for a in anfragen], encode=encode_gebuendelt)
+    for anfrage, t in zip(anfragen, treffer):
+        anfrage.setze("faq", (faq_data, t))
+
+# Reihenfolge = Priorität. Die Tore lesen nur Stichwort-Treffer bzw. die Standort-Shortlist (Token-Lookups);
+# der Fuzzy-Score über die Standorte läuft erst, wenn eine Stufe den Standort wirklich braucht,
+# und der Encoder nur, wenn keine Regel greift und BM25 nicht eindeutig ist.
+chat_pipeline = Pipeline("chat", [
+    Stufe("nähe", KOSTEN_INDEX, naehe_stufe,
+          tor=lambda a: a.lat is not None and a.lon is not None and a.stichworte.hat("nähe")),
+    Stufe("öffnungszeiten", KOSTEN_FUZZY, oeffnungszeiten_antwort,
+          tor=lambda a: a.stichworte.hat("öffnungszeiten"),
+          stapel=lambda anfragen: standorte_vorab([a for a in anfragen if not ist_oeffnungszeiten_liste(a)])),
+    Stufe("jobs", KOSTEN_INDEX, job_antwort, tor=lambda a: a.fragetyp == "job"),
+    Stufe("standort", KOSTEN_FUZZY, standort_stufe,
+          tor=lambda a: a.fragetyp == "standort" and bool(a.shortlist), stapel=standorte_vorab),
+    Stufe("standort_erkannt", KOSTEN_FUZZY, standort_erkannt_stufe, tor=lambda a: bool(a.shortlist), stapel=standorte_vorab),
+    Stufe("faq", KOSTEN_ENCODER, faq_stufe, stapel=faq_vorab),
+])
+
+def beantworte_anfrage(anfrage: ChatAnfrage):
+    # Angemeldet, damit der Micro-Batcher auf diese Anfrage nur wartet, solange sie noch encodieren könnte
+    with encoder.unterwegs():
+        _, antwort = chat_pipeline.beantworte(anfrage)
+    return antwort or keine_antwort()
+
+def beantworte_frage(frage: str, lat: float = None, lon: float = None):
+    return beantworte_anfrage(ChatAnfrage(frage, lat, lon))
+
+def beantworte_fragen(fragen):
+    # Wie beantworte_frage für eine ganze Liste, Stufe für Stufe: Standort-Scores als eine Matrix,
+    # alle FAQ-Kandidaten in einem model.encode-Aufruf und einer Suche im FAQ-Vektorindex
+    daten = standort_daten
+    ergebnisse = chat_pipeline.beantworte_alle([ChatAnfrage(f, daten=daten) for f in fragen])
+    return [antwort or keine_antwort() for _, antwort in ergebnisse]
@@ -0,0 +1,500 @@
+import logging
+import os
+import re
+import threading
+import time
+from functools import lru_cache
+
+import numpy as np
+from rapidfuzz import fuzz, process
+
+from fuzzy_engine import StandortScorerPartial
+from job_katalog import JobKatalog
+from faq_cache import encode_faq_fragen
+from faq_index import FaqVektorIndex, FAQ_INDEX_DIR, top_k
+from faq_bm25 import FaqBm25Index, FAQ_BM25_SICHER
+from faq_watcher import FaqWatcher
+from feed_parser import oeffne_stream, parse_job_urls
+from standort_model import parse_standorte
+from query_cache import QueryEmbeddingCache
+from keyword_automat import KeywordAutomat
+from metriken import METRIKEN
+from pipeline import Anfrage, Stufe, Pipeline, zwischenergebnis, KOSTEN_INDEX, KOSTEN_FUZZY, KOSTEN_ENCODER
+from textnorm import normalisiere_frage
+
+logger = logging.getLogger("chatbot")
+
+# Dauer je Pipeline-Stufe; ein Lock + bisect pro Messung, bleibt dauerhaft an. Die Engine misst BM25 und
+# Ähnlichkeit selbst, chat_backend die übrigen Stufen und die Encoder-Aufrufe
+STUFE_DAUER = METRIKEN.histogramm("chatbot_stufe_dauer_seconds", "Dauer je Pipeline-Stufe", ("stufe",))
+
+# Gemeinsame Chat-Engine für chatbot.py (Streamlit), chat_backend.py (FastAPI) und chat_logic.py.
+# Modell, FAQ-Embeddings sowie Standort- und Jobindizes werden einmal pro Prozess aufgebaut;
+# eine Anfrage kostet danach nur noch die Arbeit für die Frage selbst.
+
+MODEL_NAME = "all-MiniLM-L6-v2"
+FAQ_DIR = "faq"
+STANDORT_XML = "standorte-test.xml"
+JOB_SITEMAP_URL = "https://novotergum.de/novotergum_job-sitemap.xml"
+# Mindest-Score (0-100) für den lexikalischen FAQ-Abgleich, solange das Modell noch lädt
+FAQ_LEXIKALISCH_SCHWELLE = float(os.getenv("FAQ_LEXIKALISCH_SCHWELLE", "75"))
+# Mindest-Kosinus-Ähnlichkeit für eine FAQ-Antwort über das Embedding
+FAQ_SCHWELLE = float(os.getenv("FAQ_SCHWELLE", "0.6"))
+# Ist BM25 allein nicht eindeutig, ordnet der BM25-Score (0-1) mit diesem Gewicht die Einträge um, deren Kosinus
+# höchstens FAQ_FUSION_ABSTAND unter dem besten liegt; Schwelle und gemeldeter Score bleiben der reine Kosinus
+FAQ_FUSION_GEWICHT = float(os.getenv("FAQ_FUSION_GEWICHT", "0.15"))
+FAQ_FUSION_ABSTAND = float(os.getenv("FAQ_FUSION_ABSTAND", "0.05"))
+# FAQ-Treffer je Anfrage; chatbot.py zeigt sie als Vorschläge, wenn keiner sicher passt
+FAQ_VORSCHLAEGE = 3
+
+# --- Stichwortlisten für die Intent-Erkennung ---
+standort_stichworte = [" in ", " bei ", "nähe", "wo ist", "standort", "zentrum", "praxis", "adresse", "map", "google maps"]
+job_stichworte = [
+    "job", "jobs", "stelle", "stellen", "bewerbung", "bewerben", "karriere",
+    "jobangebot", "jobangebote", "stellenangebot", "stellenangebote", "ausschreibung"
+]
+standort_intent_stichworte = [
+    "öffnungszeiten", "wie lange geöffnet", "wann geöffnet", "wann offen",
+    "adresse", "anschrift", "lage", "standort", "zentrum", "praxis",
+    "wo finde ich", "wo ist", "karte", "google maps", "anfahrt", "anfahrtsbeschreibung",
+    "nummer", "sprechzeiten", "besuchszeiten", "map", "maps-link",
+    "termin", "termine", "terminvereinbarung", "termin machen", "termin buchen"
+]
+kategorie_stichworte = {
+    "Ergotherapeut": ["ergo"],
+    "Physiotherapiezentrum": ["physio", "krankengymnast"],
+    "Logopädie": ["logo", "sprachtherapie"],
+}
+
+# Alle Listen in einem Automaten: eine Frage wird einmal durchlaufen, statt einmal pro Liste und Stichwort
+intent_automat = KeywordAutomat({
+    "standort": standort_stichworte,
+    "job": job_stichworte,
+    "standort_intent": standort_intent_stichworte,
+    **{f"kategorie:{k}": woerter for k, woerter in kategorie_stichworte.items()},
+})
+
+# --- Berufsgruppen für den Job-Filter ---
+relevante_berufe = {
+    "physiotherapeut": ["physiotherapeut", "physiotherapeutin", "physiotherapie", "physio", "kinderphysiotherapeut", "kinderphysiotherapeutin", "mt", "kgg", "training", "sport"],
+    "logopäde": ["logopäde", "logopädin", "logopaedie", "logopädie", "sprachtherapie"],
+    "ergotherapeut": ["ergotherapeut", "ergotherapeutin", "ergotherapie", "ergo"],
+    "rezeption": ["rezeption", "empfang", "rezeptionist", "rezeptionistin"],
+    "leitung": ["leitung", "zentrumsmanager", "bereichsleitung", "fachleitung"],
+    "verwaltung": ["verwaltung", "admin", "assistenz", "buchhaltung", "office", "teamassistenz"],
+}
+
+# --- Jobtitel aus URL extrahieren ---
+JOBTITEL_BLACKLIST = {
+    "m", "w", "d", "in", "fuer", "für", "der", "die", "und", "mit",
+    "hausbesuche", "team", "std", "stunden", "woche", "monat", "jahr",
+    "ab", "sofort", "nach", "vereinbarung", "job", "karriere",
+    "bis", "zu", "haus", "heimbesuche"
+}
+
+JOBTITEL_HIGHLIGHT = {
+    "azubi": "(Azubi)",
+    "auszubildender": "(Azubi)",
+    "leitung": "Leitung",
+    "fachliche": "Fachliche Leitung",
+    "empfang": "Empfang",
+    "rezeption": "Rezeption",
+    "rezeptionist": "Rezeptionist",
+    "physiotherapeut": "Physiotherapeut",
+    "kinderphysiotherapeut": "Kinderphysiotherapeut",
+    "osteopath": "Osteopath",
+    "massagetherapeut": "Massagetherapeut",
+    "lymphdrainage": "Lymphdrainage",
+    "ergotherapeut": "Ergotherapeut",
+    "logopaede": "Logopäde",
+    "logopaedie": "Logopädie",
+    "verwaltung": "Verwaltung",
+    "assistenz": "Assistenz",
+    "teamassistenz": "Teamassistenz",
+    "zentrumsmanager": "Zentrumsmanager",
+    "recruiting": "Recruiting",
+    "werkstudent": "Werkstudent",
+    "data": "Datenanalyse",
+    "ki": "KI",
+    "innovation": "Innovation",
+    "buchhaltung": "Buchhaltung",
+    "marketing": "Marketing",
+    "training": "Training",
+    "sport": "Sport",
+    "controller": "Controller",
+    "pmi": "PMI Manager",
+    "office": "Office Management",
+    "administration": "Administration",
+    "hausbesuche": "Hausbesuche",
+    "heim": "Heimbesuche",
+    "remote": "Remote",
+    "hybrid": "Hybrid",
+    "minijob": "Minijob",
+    "teilzeit": "Teilzeit",
+    "vollzeit": "Vollzeit",
+}
+
+
+def extrahiere_jobtitel(url):
+    slug = url.rstrip("/").split("/")[-1]
+    teile = slug.split("-")
+
+    # IDs & Füllwörter entfernen
+    teile = [t for t in teile if not t.isdigit() and t.lower() not in JOBTITEL_BLACKLIST]
+
+    titelteile = []
+    ortsteile = []
+
+    for teil in teile:
+        teil_lc = teil.lower()
+        if teil_lc in JOBTITEL_HIGHLIGHT:
+            titelteile.append(JOBTITEL_HIGHLIGHT[teil_lc])
+        elif re.match(r"^[a-zäöüß]+$", teil_lc):
+            # potentieller Ortsteil (z. B. "krefeld", "ford", "werke")
+            ortsteile.append(teil.capitalize())
+        else:
+            titelteile.append(teil.capitalize())
+
+    jobtitel = " – ".join(titelteile).strip(" –")
+
+    if ortsteile:
+        ort = " ".join(ortsteile)
+        return f"**{jobtitel}** (m/w/d) in **{ort}**"
+    else:
+        return f"**{jobtitel}** (m/w/d)"
+
+
+# --- Intent-Erkennung ---
+@lru_cache(maxsize=256)
+def analysiere_frage(frage):
+    # Die Intent-Prüfungen fragen dieselbe Nachricht mehrfach ab; gescannt wird nur einmal
+    return intent_automat.scan(frage)
+
+
+def frage_betrifft_standort(user_input):
+    return analysiere_frage(user_input).hat("standort")
+
+
+def frage_betrifft_job(user_input):
+    return analysiere_frage(user_input).hat("job")
+
+
+def frage_hat_standort_intent(frage: str) -> bool:
+    return analysiere_frage(frage).hat("standort_intent")
+
+
+def finde_kategorie_in_frage(user_input):
+    treffer = analysiere_frage(user_input)
+    return next((k for k in kategorie_stichworte if treffer.hat(f"kategorie:{k}")), None)
+
+
+# --- Standort-Ausgabeformat ---
+def format_standort(eintrag):
+    return (
+        f"📍 **{eintrag.adresse}**\n"
+        f"📞 [{eintrag.telefon}](tel:{eintrag.telefon.replace(' ', '')})\n"
+        f"🕒 {eintrag.zeiten_text(deutsch=True)}\n"
+        f"[🌍 Google Maps öffnen]({eintrag.maps})"
+    )
+
+
+# --- Daten laden ---
+def setze_torch_threads(anzahl):
+    # Intra-op-Threads von torch; ohne installiertes torch (Modell noch nicht geladen, Tests) ohne Wirkung
+    try:
+        import torch
+    except ImportError:
+        return
+    torch.set_num_threads(anzahl)
+
+
+def lade_standorte(xml_path=STANDORT_XML):
+    # Gemeinsames Standort-Modell (standort_model.py), gestreamt geparst
+    try:
+        return parse_standorte(xml_path)
+    except Exception as e:
+        logger.error(f"Fehler beim Laden der Standorte: {e}")
+        return []
+
+
+def lade_job_urls(sitemap_url=JOB_SITEMAP_URL):
+    try:
+        # Sitemap wird gestreamt geparst; Sitemap-Indizes werden bis zu den Kind-Sitemaps verfolgt
+        with oeffne_stream(sitemap_url) as stream:
+            return parse_job_urls(stream)
+    except Exception as e:
+        logger.error(f"Fehler beim Laden der Job-URLs: {e}")
+        return {}
+
+
+def fusioniere(kosinus, bm25):
+    # Rang-Schlüssel je (Frage, Eintrag): Einträge nahe am besten Kosinus bekommen den gewichteten BM25-Score dazu
+    # und bleiben damit vor allen übrigen. Umgeordnet wird nie über FAQ_SCHWELLE hinweg, damit BM25 nicht
+    # entscheidet, ob überhaupt geantwortet wird.
+    beste = kosinus.max(axis=1, keepdims=True)
+    nah = (kosinus >= beste - FAQ_FUSION_ABSTAND) & ((kosinus > FAQ_SCHWELLE) == (beste > FAQ_SCHWELLE))
+    return kosinus + np.where(nah, FAQ_FUSION_GEWICHT * bm25, 0.0)
+
+
+def faq_sicher(scores, modus):
+    # Bester Treffer aus faq_suche gut genug für eine Antwort; jeder Modus mit der Schwelle seiner eigenen Skala
+    if not scores:
+        return False
+    if modus == "bm25":
+        return scores[0] >= FAQ_BM25_SICHER
+    return scores[0] > FAQ_SCHWELLE
+
+
+class ChatEngine:
+    # Besitzt Modell, FAQ-Index sowie Standort- und Jobindizes. Daten werden über setze_* komplett
+    # neu aufgebaut und dann in einem Schritt ausgetauscht; laufende Anfragen sehen alten oder neuen Stand.
+    #
+    # standorte_xml / job_sitemap_url = None: keine Standorte bzw. Jobs, bis setze_standorte / setze_job_urls
+    # aufgerufen wird. Das Backend nutzt nur Modell und FAQ und baut Standort- und Jobindizes selbst.
+    #
+    # modell_laden = False: sentence_transformers (und damit torch) wird erst mit lade_modell() importiert,
+    # z. B. im Hintergrund nach dem Start. Bis dahin beantworten BM25 (eindeutige Treffer) und faq_lexikalisch()
+    # FAQ-Fragen.
+    #
+    # Der FAQ-Ordner wird über faq_watcher gelesen; faq_watcher.start() übernimmt Änderungen im laufenden
+    # Betrieb. Nach jeder Veröffentlichung werden die Funktionen in faq_beobachter ohne Argumente aufgerufen.
+
+    def __init__(self, faq_dir=FAQ_DIR, standorte_xml=STANDORT_XML, job_sitemap_url=JOB_SITEMAP_URL,
+                 model_name=MODEL_NAME, modell_laden=True):
+        self.model_name = model_name
+        self.model = None
+        self.modell_bereit = threading.Event()
+        self.modell_fehler = None
+        self.modell_ladezeit_s = None
+        self._modell_lock = threading.Lock()
+        self._faq_lock = threading.Lock()
+        # Frage-Embeddings überleben Reruns (z. B. Deep-Links, Vorschlags-Buttons)
+        self.frage_cache = QueryEmbeddingCache(lambda frage: self.model.encode(frage, convert_to_numpy=True))
+
+        self.faq_beobachter = []
+        self.faq_watcher = FaqWatcher(faq_dir, self.setze_faq)
+        self.faq_watcher.pruefe()
+        self.setze_standorte(lade_standorte(standorte_xml) if standorte_xml else [])
+        self.setze_job_urls(lade_job_urls(job_sitemap_url) if job_sitemap_url else {})
+        if modell_laden:
+            self.lade_modell()
+
+    # --- Modell ---
+    def lade_modell(self) -> bool:
+        # Lädt das Modell und encodiert danach die FAQ; mehrfach aufrufbar, geladen wird nur einmal
+        with self._modell_lock:
+            if self.modell_bereit.is_set():
+                return True
+            start = time.perf_counter()
+            try:
+                from sentence_transformers import SentenceTransformer
+                model = SentenceTransformer(self.model_name)
+            except Exception as e:
+                self.modell_fehler = str(e)
+                logger.error(f"Fehler beim Laden des Modells {self.model_name}: {e}")
+                return False
+            with self._faq_lock:
+                self.model = model
+                self._setze_faq(self._faq[0])
+            self.modell_fehler = None
+            self.modell_ladezeit_s = time.perf_counter() - start
+            self.modell_bereit.set()
+            logger.info(f"Modell {self.model_name} in {self.modell_ladezeit_s:.1f} s geladen.")
+            return True
+
+    # --- Daten austauschen ---
+    def setze_faq(self, faq_data):
+        with self._faq_lock:
+            self._setze_faq(faq_data)
+
+    def _setze_faq(self, faq_data):
+        # Embeddings kommen aus dem Plattencache; encodiert werden nur neue/geänderte Fragen, entfernte fallen weg.
+        # Der Index wird vollständig neu gebaut und zusammen mit faq_data in einem Schritt veröffentlicht,
+        # weil seine ids die Positionen in faq_data sind.
+        # Der BM25-Index braucht kein Modell; ohne Modell gibt es zusätzlich die normalisierten Fragen für rapidfuzz.
+        fragen = [q for q, _ in faq_data]
+        index = None
+        if self.model is not None and fragen:
+            vektoren = encode_faq_fragen(self.model, self.model_name, fragen)
+            index = FaqVektorIndex.aus_vektoren(vektoren, ablage=FAQ_INDEX_DIR)
+        self._faq_lexikalisch = (faq_data, [normalisiere_frage(q) for q in fragen])
+        self._faq = (faq_data, index, FaqBm25Index(faq_data))
+        for beobachter in self.faq_beobachter:
+            beobachter()
+
+    def setze_standorte(self, standorte):
+        self._standorte = (standorte, StandortScorerPartial(standorte))
+
+    def setze_job_urls(self, job_urls):
+        # Jobtitel, Orts- und Berufsindex werden einmal beim Laden der Sitemap berechnet
+        self.job_katalog = JobKatalog(job_urls, relevante_berufe, titel=extrahiere_jobtitel, normalisiert=True)
+
+    @property
+    def faq(self):
+        # (faq_data, FaqVektorIndex) aus demselben Stand; Index ist None ohne FAQ oder ohne Modell
+        faq_data, index, _ = self._faq
+        return faq_data, index
+
+    @property
+    def faq_bm25(self):
+        return self._faq[2]
+
+    @property
+    def faq_data(self):
+        return self._faq[0]
+
+    @property
+    def standorte(self):
+        return self._standorte[0]
+
+    @property
+    def job_urls(self):
+        return self.job_katalog.job_urls
+
+    # --- Suche ---
+    def finde_passenden_standort(self, user_input):
+        # max(partial_ratio) über Name, Stadt, Titel, Kategorie + Boosts, als ein cdist-Aufruf
+        standorte, scorer = self._standorte
+        best = scorer.bester(user_input, schwelle=80)
+        return standorte[best] if best is not None else None
+
+    def finde_jobs_fuer_ort(self, frage):
+        # Kein konkreter Ort → alle Jobs; erkannte Berufe schränken per Index-Schnittmenge ein
+        return self.job_katalog.suche(frage)
+
+    def faq_suche(self, fragen, k=1, encode=None):
+        # (faq_data, [(ids, scores, modus), ...]) je Frage die k besten FAQ-Einträge nach Rang, aus demselben Stand.
+        # modus "bm25": lexikalisch eindeutig, beantwortet ohne Encoder, scores sind BM25-Scores;
+        # "fusion": scores sind Kosinus-Ähnlichkeiten, BM25 entscheidet nur zwischen fast gleich ähnlichen Einträgen;
+        # None: leer, weil das Modell noch lädt (oder keine FAQ da ist). Ob ein Treffer reicht: faq_sicher.
+        # encode: Liste von Fragen -> Embeddings; Standard ist der Frage-Cache der Engine
+        faq_data, index, bm25 = self._faq
+        ergebnisse = [([], [], None)] * len(fragen)
+        offen, lexikalisch = [], []
+        for i, frage in enumerate(fragen):
+            with STUFE_DAUER.zeit("bm25"):
+                woerter = bm25.suchwoerter(frage)
+                scores = bm25.bewerte(frage, woerter)
+            if bm25.eindeutig(scores, woerter):
+                spalten = top_k(scores[None, :], k)[0]
+                ergebnisse[i] = (spalten.tolist(), scores[spalten].tolist(), "bm25")
+            elif index is not None:
+                offen.append(i)
+                lexikalisch.append(scores)
+        if offen:
+            encode = encode or self._encode_fragen
+            ids = index.ids
+            anfragen = np.asarray(encode([fragen[i] for i in offen]))
+            with STUFE_DAUER.zeit("aehnlichkeit"):
+                kosinus = index.scores(anfragen)
+            spalten = top_k(fusioniere(kosinus, np.stack(lexikalisch)[:, ids]), k)
+            kosinus = np.take_along_axis(kosinus, spalten, axis=1)
+            for zeile, i in enumerate(offen):
+                ergebnisse[i] = (ids[spalten[zeile]].tolist(), kosinus[zeile].tolist(), "fusion")
+        return faq_data, ergebnisse
+
+    def _encode_fragen(self, fragen):
+        return [self.frage_cache.encode(frage) for frage in fragen]
+
+    def faq_treffer(self, frage, k=1):
+        # (faq_data, ids, scores, modus) der k besten FAQ-Einträge aus demselben Stand, wie faq_suche;
+        # leer ohne FAQ oder solange das Modell noch lädt und BM25 nicht eindeutig ist
+        faq_data, [(ids, scores, modus)] = self.faq_suche([frage], k)
+        return faq_data, ids, scores, modus
+
+    def faq_lexikalisch(self, frage, schwelle=FAQ_LEXIKALISCH_SCHWELLE):
+        # (faq_data, index, score 0-1) der ähnlichsten FAQ-Frage per token_sort_ratio; index None ohne Treffer
+        faq_data, fragen = self._faq_lexikalisch
+        treffer = process.extractOne(
+            normalisiere_frage(frage), fragen, scorer=fuzz.token_sort_ratio, score_cutoff=schwelle
+        ) if fragen else None
+        if treffer is None:
+            return faq_data, None, 0.0
+        return faq_data, treffer[2], treffer[1] / 100
+
+    def anfrage(self, frage) -> "EngineAnfrage":
+        return EngineAnfrage(self, frage)
+
+    def run_chatbot(self, message: str) -> str:
+        _, antwort = engine_pipeline.beantworte(self.anfrage(message))
+        return antwort or "Ich konnte leider keine passende Antwort finden."
+
+
+class EngineAnfrage(Anfrage):
+    # Zwischenergebnisse einer Frage für run_chatbot und chatbot.py: der Standort-Abgleich (partial_ratio über
+    # alle Standorte) und die FAQ-Suche laufen höchstens einmal, und nur wenn eine Stufe sie braucht
+
+    def __init__(self, engine, frage):
+        super().__init__(frage)
+        self.engine = engine
+
+    @zwischenergebnis
+    def standort_intent(self):
+        return frage_hat_standort_intent(self.frage)
+
+    @zwischenergebnis
+    def betrifft_job(self):
+        return frage_betrifft_job(self.frage)
+
+    @zwischenergebnis
+    def standort(self):
+        return self.engine.finde_passenden_standort(self.frage)
+
+    @zwischenergebnis
+    def faq(self):
+        # (faq_data, ids, scores, modus) wie faq_treffer
+        return self.engine.faq_treffer(self.frage, k=FAQ_VORSCHLAEGE)
+
+    @zwischenergebnis
+    def jobs(self):
+        return self.engine.finde_jobs_fuer_ort(self.frage)
+
+
+def standort_stufe(anfrage):
+    # 1. Standortprüfung
+    return format_standort(anfrage.standort) if anfrage.standort else None
+
+
+def faq_stufe(anfrage):
+    # 2. FAQ
+    faq_data, ids, scores, modus = anfrage.faq
+    if ids:
+        return faq_data[ids[0]][1] if faq_sicher(scores, modus) else None
+    if not anfrage.engine.modell_bereit.is_set():
+        faq_data, idx, _ = anfrage.engine.faq_lexikalisch(anfrage.frage)
+        if idx is not None:
+            return faq_data[idx][1]
+    return None
+
+
+def job_stufe(anfrage):
+    # 3. Jobs
+    if anfrage.jobs:
+        links = "\n".join(f"- {j.titel}: {j.url}" for j in anfrage.jobs[:5])
+        return f"Folgende Stellenangebote passen zu deiner Anfrage:\n{links}"
+    return None
+
+
+engine_pipeline = Pipeline("engine", [
+    Stufe("standort", KOSTEN_FUZZY, standort_stufe, tor=lambda a: a.standort_intent),
+    Stufe("faq", KOSTEN_ENCODER, faq_stufe),
+    Stufe("jobs", KOSTEN_INDEX, job_stufe, tor=lambda a: a.betrifft_job),
+])
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def hole_engine(**kwargs) -> ChatEngine:
+    # Eine Engine pro Prozess; kwargs gelten nur beim ersten Aufruf, der sie aufbaut
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = ChatEngine(**kwargs)
+    return _engine
+
+
+def run_chatbot(message: str) -> str:
+    return hole_engine().run_chatbot(message)
@@ -1,15 +1,19 @@
 import streamlit as st
-from chat_backend_api import run_chatbot, lade_standorte, lade_job_urls
+from chat_engine import hole_engine
 
-# --- Standorte & Jobs einmal laden ---
-standorte = lade_standorte("standorte-test.xml")
-job_urls = lade_job_urls()
+# --- Engine (Modell, FAQ, Standorte, Jobs) einmal pro Prozess laden ---
+@st.cache_resource(show_spinner=False)
+def lade_engine():
+    engine = hole_engine()
+    engine.faq_watcher.start()  # Änderungen in faq/ ohne Neustart übernehmen
+    return engine
+
+engine = lade_engine()
 
 # --- UI Konfiguration ---
 st.set_page_config(page_title="NOVOTERGUM Chatbot")
 st.title("NOVOTERGUM Chatbot 😊")
 st.caption("Letztes Update: 2025-07-13")
-
 # --- Frage aus URL oder UI ---
 params = st.query_params
 vorgegebene_frage = params.get("frage", "")
@@ -17,7 +21,7 @@ frage = st.text_input("Stelle deine Frage:", value=vorgegebene_frage)
 
 # --- Antwort generieren ---
 if frage:
-    antwort = run_chatbot(frage, standorte, job_urls)
+    antwort = engine.run_chatbot(frage)
     st.markdown("**Antwort:**")
     st.markdown(antwort)
 else:
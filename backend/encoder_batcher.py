@@ -0,0 +1,142 @@
+import asyncio
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError
+from contextlib import contextmanager
+
+logger = logging.getLogger("chatbot")
+
+# Sammelfenster und Obergrenzen für gebündelte Encoder-Aufrufe
+ENCODER_BATCH_WINDOW_MS = float(os.getenv("ENCODER_BATCH_WINDOW_MS", "5"))
+ENCODER_MAX_BATCH = int(os.getenv("ENCODER_MAX_BATCH", "32"))
+ENCODER_TIMEOUT = float(os.getenv("ENCODER_TIMEOUT", "10"))
+
+# Weckt den Sammel-Thread, wenn der letzte angemeldete Aufrufer ohne encode() fertig wird
+_WECKEN = object()
+
+
+class MicroBatcher:
+    # Bündelt gleichzeitige Einzel-Anfragen zu einem model.encode-Aufruf.
+    # encode_batch bekommt eine Liste von Texten und liefert eine gleich lange Folge von Ergebnissen.
+    #
+    # Das Sammelfenster bleibt nur offen, solange noch ein Aufrufer kommen kann: Aufrufer melden sich mit
+    # unterwegs() an (z. B. eine /chat-Anfrage, die vielleicht die FAQ-Stufe erreicht). Ist die Warteschlange
+    # leer und hat kein angemeldeter Aufrufer mehr offen, geht der Batch sofort los – eine einzelne Anfrage
+    # wartet also nicht ENCODER_BATCH_WINDOW_MS umsonst.
+
+    def __init__(self, encode_batch, window_ms=ENCODER_BATCH_WINDOW_MS, max_batch=ENCODER_MAX_BATCH,
+                 timeout=ENCODER_TIMEOUT):
+        self._encode_batch = encode_batch
+        self.window = window_ms / 1000
+        self.max_batch = max_batch
+        self.timeout = timeout
+        self._queue = queue.Queue()
+        self.batches = 0
+        self.items = 0
+        self._erwartet = 0
+        self._erwartet_lock = threading.Lock()
+        self._lokal = threading.local()
+        self._starte_thread()
+        if hasattr(os, "register_at_fork"):
+            # Nach fork (gunicorn --preload) existiert nur der forkende Thread: Warteschlange und Thread neu anlegen
+            os.register_at_fork(after_in_child=self._nach_fork)
+
+    def _starte_thread(self):
+        self._thread = threading.Thread(target=self._loop, name="encoder-batcher", daemon=True)
+        self._thread.start()
+
+    def _nach_fork(self):
+        self._queue = queue.Queue()
+        self._erwartet = 0
+        self._erwartet_lock = threading.Lock()
+        self._lokal = threading.local()
+        self._starte_thread()
+
+    @contextmanager
+    def unterwegs(self):
+        # Kündigt für diesen Thread höchstens ein baldiges submit()/encode() an
+        with self._erwartet_lock:
+            self._erwartet += 1
+        self._lokal.angemeldet = True
+        try:
+            yield
+        finally:
+            if self._lokal.angemeldet:
+                self._abmelden(wecken=True)
+
+    def _abmelden(self, wecken):
+        self._lokal.angemeldet = False
+        with self._erwartet_lock:
+            self._erwartet -= 1
+            letzter = self._erwartet == 0
+        if wecken and letzter:
+            self._queue.put(_WECKEN)
+
+    def submit(self, text) -> Future:
+        future = Future()
+        self._queue.put((text, future))
+        if getattr(self._lokal, "angemeldet", False):
+            # Erst nach put abmelden, sonst könnte der Sammel-Thread dazwischen ein leeres Fenster schließen
+            self._abmelden(wecken=False)
+        return future
+
+    def encode(self, text):
+        future = self.submit(text)
+        try:
+            return future.result(timeout=self.timeout)
+        except TimeoutError:
+            future.cancel()
+            raise
+
+    async def encode_async(self, text):
+        return await asyncio.wait_for(asyncio.wrap_future(self.submit(text)), timeout=self.timeout)
+
+    def _sammle_batch(self):
+        eintrag = self._queue.get()
+        while eintrag is _WECKEN:
+            eintrag = self._queue.get()
+        batch = [eintrag]
+        frist = time.monotonic() + self.window
+        while len(batch) < self.max_batch:
+            if self._queue.empty() and self._erwartet == 0:
+                break
+            rest = frist - time.monotonic()
+            if rest <= 0:
+                break
+            try:
+                eintrag = self._queue.get(timeout=rest)
+            except queue.Empty:
+                break
+            if eintrag is not _WECKEN:
+                batch.append(eintrag)
+        return batch
+
+    def _loop(self):
+        while True:
+            batch = self._sammle_batch()
+            # Abgebrochene Anfragen (z. B. Timeout beim Aufrufer) nicht mehr encodieren
+            batch = [(text, f) for text, f in batch if f.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            try:
+                ergebnisse = self._encode_batch([text for text, _ in batch])
+                for (_, future), ergebnis in zip(batch, ergebnisse):
+                    future.set_result(ergebnis)
+            except Exception as e:
+                logger.error(f"Fehler beim gebündelten Encodieren: {e}")
+                for _, future in batch:
+                    future.set_exception(e)
+            self.batches += 1
+            self.items += len(batch)
+
+    def stats(self):
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "avg_batch": round(self.items / self.batches, 2) if self.batches else 0.0,
+            "queue": self._queue.qsize(),
+            "erwartet": self._erwartet,
+        }
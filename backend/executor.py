@@ -0,0 +1,65 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Threads für die CPU-Stufen (Fuzzy-Matching, Encoder, Ähnlichkeit) und maximale Warteschlange davor
+CHAT_WORKERS = int(os.getenv("CHAT_WORKERS", str(min(8, (os.cpu_count() or 1) + 2))))
+CHAT_MAX_QUEUE = int(os.getenv("CHAT_MAX_QUEUE", "32"))
+CHAT_TIMEOUT = float(os.getenv("CHAT_TIMEOUT", "5"))
+CHAT_RETRY_AFTER = int(os.getenv("CHAT_RETRY_AFTER", "1"))
+# POST /chat/batch: maximale Fragen pro Anfrage und Zeitlimit für die ganze Liste
+CHAT_BATCH_MAX = int(os.getenv("CHAT_BATCH_MAX", "256"))
+CHAT_BATCH_TIMEOUT = float(os.getenv("CHAT_BATCH_TIMEOUT", "60"))
+
+
+class Ueberlastet(Exception):
+    pass
+
+
+class BoundedExecutor:
+    # ThreadPool mit harter Obergrenze für laufende + wartende Aufgaben.
+    # Ist sie erreicht, wird sofort abgelehnt statt alle Anfragen gleichzeitig langsam zu machen.
+
+    def __init__(self, workers=CHAT_WORKERS, max_queue=CHAT_MAX_QUEUE, timeout=CHAT_TIMEOUT):
+        self.workers = workers
+        self.kapazitaet = workers + max_queue
+        self.timeout = timeout
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="chat")
+        self._plaetze = threading.BoundedSemaphore(self.kapazitaet)
+        self._lock = threading.Lock()
+        self.in_arbeit = 0
+        self.abgelehnt = 0
+        self.zeitueberschreitungen = 0
+
+    def _freigeben(self, _future):
+        with self._lock:
+            self.in_arbeit -= 1
+        self._plaetze.release()
+
+    async def run(self, fn, *args, timeout=None):
+        if not self._plaetze.acquire(blocking=False):
+            with self._lock:
+                self.abgelehnt += 1
+            raise Ueberlastet()
+        with self._lock:
+            self.in_arbeit += 1
+        # Der Platz wird erst frei, wenn der Thread wirklich fertig ist – auch nach einem Timeout
+        future = self._pool.submit(fn, *args)
+        future.add_done_callback(self._freigeben)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout=timeout or self.timeout)
+        except asyncio.TimeoutError:
+            with self._lock:
+                self.zeitueberschreitungen += 1
+            raise
+
+    def stats(self):
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "kapazitaet": self.kapazitaet,
+                "in_arbeit": self.in_arbeit,
+                "abgelehnt": self.abgelehnt,
+                "zeitueberschreitungen": self.zeitueberschreitungen,
+            }
@@ -0,0 +1,173 @@
+import os
+from functools import lru_cache
+
+import numpy as np
+
+from textnorm import tokenisiere
+
+# Lexikalischer FAQ-Index (BM25 über Frage und Antwort). Ist der Treffer eindeutig, beantwortet die Engine die
+# Frage ohne model.encode; sonst fließt der Score in die Kosinus-Ähnlichkeit ein (siehe ChatEngine.faq_suche).
+
+FAQ_BM25_K1 = float(os.getenv("FAQ_BM25_K1", "1.2"))
+FAQ_BM25_B = float(os.getenv("FAQ_BM25_B", "0.75"))
+# Frage-Wörter zählen stärker als Antwort-Wörter (BM25F mit Feldgewichten)
+FAQ_BM25_FRAGE_GEWICHT = float(os.getenv("FAQ_BM25_FRAGE_GEWICHT", "2"))
+FAQ_BM25_ANTWORT_GEWICHT = float(os.getenv("FAQ_BM25_ANTWORT_GEWICHT", "1"))
+# Eindeutig: bester Score (0-1) mindestens FAQ_BM25_SICHER und mindestens FAQ_BM25_ABSTAND vor dem zweiten, und
+# mindestens FAQ_BM25_MIN_FRAGE_WOERTER verschiedene Suchwörter (bzw. alle, wenn die Frage weniger hat) stehen in
+# der FAQ-Frage selbst – ein zufälliges Wort in einer Antwort reicht nicht, um den Encoder zu überspringen
+FAQ_BM25_SICHER = float(os.getenv("FAQ_BM25_SICHER", "0.8"))
+FAQ_BM25_ABSTAND = float(os.getenv("FAQ_BM25_ABSTAND", "0.3"))
+FAQ_BM25_MIN_FRAGE_WOERTER = int(os.getenv("FAQ_BM25_MIN_FRAGE_WOERTER", "2"))
+
+# Kürzeste Teilwörter bei der Kompositazerlegung und Fugenelemente zwischen den Teilen ("bewerbung-s-prozess")
+MIN_TEIL = 4
+MAX_WORT = 40
+FUGEN = ("", "s", "es", "n", "en", "e")
+ENDUNGEN = ("ern", "en", "er", "es", "em", "e", "n", "s")
+
+STOPPWOERTER = frozenset("""
+    a ab aber als am an auch auf aus b bei beim bin bis bist bitte d da dann das dass dem den denn der des die
+    dir du ein eine einem einen einer eines es etc etwas euch fuer gerne ggf gibt hab habe haben hast hat hier
+    ich ihr im in ist ja kann kannst koennen koennt man mal mein meine meinen mich mir mit muss nach nicht noch
+    nur ob oder sich sie sind so soll u um und uns unter vom von war was welche welchem welchen welcher welches
+    wann warum wenn wer werden weshalb wie wieso wir wird wo z zu zum zur
+""".split())
+
+
+@lru_cache(maxsize=4096)
+def stamm(wort):
+    # Leichtes Stemming: eine Flexionsendung abschneiden, wenn mindestens MIN_TEIL Zeichen bleiben
+    for endung in ENDUNGEN:
+        if wort.endswith(endung) and len(wort) - len(endung) >= MIN_TEIL:
+            return wort[: -len(endung)]
+    return wort
+
+
+def woerter(text):
+    # Umlaute gefaltet (textnorm), Stoppwörter entfernt, gestemmt
+    return [stamm(w) for w in tokenisiere(text) if w not in STOPPWOERTER]
+
+
+class FaqBm25Index:
+    # Invertierter Index über faq_data; Dokument-ids sind die Positionen in faq_data.
+    #
+    # bewerte() liefert je Eintrag einen Score 0-1: den Anteil der IDF-Masse der Frage, den der Eintrag abdeckt.
+    # Ein Suchwort zählt voll, sobald sein BM25-Beitrag seine IDF erreicht (etwa einmal in einer Frage mittlerer
+    # Länge), seltener bzw. in langen Antworten anteilig. Unbekannte Suchwörter senken den Score.
+    #
+    # Komposita werden gegen das Vokabular der FAQ zerlegt: "Initiativbewerbung" findet "initiativ bewerben",
+    # "Bewerbung" findet "Initiativbewerbungen". Nach dem Aufbau unveränderlich, also ohne Lock lesbar.
+
+    def __init__(self, faq_data, k1=FAQ_BM25_K1, b=FAQ_BM25_B):
+        self.anzahl = len(faq_data)
+        felder = [
+            [(w, FAQ_BM25_FRAGE_GEWICHT) for w in woerter(q)] + [(w, FAQ_BM25_ANTWORT_GEWICHT) for w in woerter(a)]
+            for q, a in faq_data
+        ]
+        self._vokabular = {w for dok in felder for w, _ in dok if len(w) >= MIN_TEIL}
+        self._komposita = {}
+
+        tf = []
+        for dok in felder:
+            zaehler = {}
+            for w, gewicht in dok:
+                if w not in self._komposita:
+                    self._komposita[w] = self.zerlege(w)
+                for teil in [w] + self._komposita[w]:
+                    zaehler[teil] = zaehler.get(teil, 0.0) + gewicht
+            tf.append(zaehler)
+        # Wörter (samt Kompositum-Teilen) je FAQ-Frage für eindeutig()
+        self._frage_woerter = [
+            {teil for w in woerter(q) for teil in [w] + self._komposita[w]} for q, _ in faq_data
+        ]
+        laengen = np.array([sum(gewicht for _, gewicht in dok) for dok in felder], dtype=np.float32)
+        mittel = float(laengen.mean()) if self.anzahl and laengen.mean() > 0 else 1.0
+        norm = k1 * (1 - b + b * laengen / mittel)
+
+        postings = {}
+        for dok_id, zaehler in enumerate(tf):
+            for wort, haeufigkeit in zaehler.items():
+                postings.setdefault(wort, []).append((dok_id, haeufigkeit))
+        # Unbekannte Wörter bekommen die IDF eines Worts, das in keinem Eintrag vorkommt
+        self.idf_unbekannt = float(np.log(1 + (self.anzahl + 0.5) / 0.5))
+        self._idf = {}
+        self._postings = {}
+        for wort, liste in postings.items():
+            ids = np.array([d for d, _ in liste], dtype=np.int64)
+            haeufigkeit = np.array([h for _, h in liste], dtype=np.float32)
+            idf = float(np.log(1 + (self.anzahl - len(ids) + 0.5) / (len(ids) + 0.5)))
+            beitrag = idf * haeufigkeit * (k1 + 1) / (haeufigkeit + norm[ids])
+            self._idf[wort] = idf
+            self._postings[wort] = (ids, np.minimum(beitrag, idf).astype(np.float32))
+
+    def __len__(self):
+        return self.anzahl
+
+    def zerlege(self, wort):
+        # Teile eines Kompositums aus mindestens zwei Vokabular-Wörtern, sonst []
+        if not 2 * MIN_TEIL <= len(wort) <= MAX_WORT:
+            return []
+        return self._zerlege(wort, 0, {}) or []
+
+    def _zerlege(self, wort, start, memo):
+        # Längster passender Anfang zuerst; das letzte Teil darf noch eine Flexionsendung tragen
+        if start in memo:
+            return memo[start]
+        rest = wort[start:]
+        ergebnis = None
+        if start and (rest in self._vokabular or stamm(rest) in self._vokabular):
+            ergebnis = [rest if rest in self._vokabular else stamm(rest)]
+        for ende in range(len(wort) - MIN_TEIL, start + MIN_TEIL - 1, -1):
+            if ergebnis:
+                break
+            teil = wort[start:ende]
+            if teil not in self._vokabular and stamm(teil) not in self._vokabular:
+                continue
+            for fuge in FUGEN:
+                if wort.startswith(fuge, ende) and len(wort) - ende - len(fuge) >= MIN_TEIL:
+                    folge = self._zerlege(wort, ende + len(fuge), memo)
+                    if folge:
+                        ergebnis = [teil if teil in self._vokabular else stamm(teil)] + folge
+                        break
+        memo[start] = ergebnis
+        return ergebnis
+
+    def suchwoerter(self, frage):
+        # Bekannte Wörter direkt, unbekannte Komposita als ihre Teile, sonst als unbekanntes Wort
+        ergebnis = []
+        for w in woerter(frage):
+            for teil in [w] if w in self._idf else (self.zerlege(w) or [w]):
+                if teil not in ergebnis:
+                    ergebnis.append(teil)
+        return ergebnis
+
+    def bewerte(self, frage, suchwoerter=None):
+        # Score 0-1 je Eintrag (Position in faq_data); suchwoerter, falls schon berechnet
+        scores = np.zeros(self.anzahl, dtype=np.float32)
+        masse = 0.0
+        for wort in self.suchwoerter(frage) if suchwoerter is None else suchwoerter:
+            masse += self._idf.get(wort, self.idf_unbekannt)
+            if wort in self._postings:
+                ids, beitrag = self._postings[wort]
+                scores[ids] += beitrag
+        return scores / masse if masse > 0 else scores
+
+    def eindeutig(self, scores, suchwoerter):
+        # Bester Eintrag klar genug, um ohne Embedding zu antworten
+        if len(scores) == 0 or not suchwoerter:
+            return False
+        bester = int(scores.argmax())
+        if float(scores[bester]) < FAQ_BM25_SICHER:
+            return False
+        if len(scores) > 1 and float(scores[bester] - np.partition(scores, len(scores) - 2)[-2]) < FAQ_BM25_ABSTAND:
+            return False
+        in_frage = sum(1 for w in suchwoerter if w in self._frage_woerter[bester])
+        return in_frage >= min(FAQ_BM25_MIN_FRAGE_WOERTER, len(suchwoerter))
+
+    def stats(self):
+        return {
+            "anzahl": self.anzahl,
+            "woerter": len(self._postings),
+            "komposita": sum(1 for teile in self._komposita.values() if teile),
+        }
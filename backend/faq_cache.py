@@ -0,0 +1,89 @@
+import hashlib
+import json
+import logging
+import os
+import re
+
+import numpy as np
+
+logger = logging.getLogger("chatbot")
+
+FAQ_CACHE_DIR = os.getenv("FAQ_CACHE_DIR", os.path.join(".cache", "faq_embeddings"))
+
+
+def frage_hash(frage: str) -> str:
+    return hashlib.sha1(frage.encode("utf-8")).hexdigest()
+
+
+def _cache_pfade(model_name: str, cache_dir: str):
+    name = re.sub(r"[^\w.-]+", "_", model_name)
+    return os.path.join(cache_dir, f"{name}.npy"), os.path.join(cache_dir, f"{name}.json")
+
+
+def _lade_cache(model_name: str, cache_dir: str):
+    npy_pfad, manifest_pfad = _cache_pfade(model_name, cache_dir)
+    try:
+        with open(manifest_pfad, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest.get("model") != model_name:
+            return None, []
+        vektoren = np.load(npy_pfad, mmap_mode="r")
+        hashes = manifest.get("hashes", [])
+        if vektoren.dtype != np.float32 or vektoren.ndim != 2 or vektoren.shape[0] != len(hashes):
+            logger.warning("FAQ-Embedding-Cache passt nicht zum Manifest, wird neu aufgebaut.")
+            return None, []
+        return vektoren, hashes
+    except FileNotFoundError:
+        return None, []
+    except Exception as e:
+        logger.warning(f"FAQ-Embedding-Cache nicht lesbar: {e}")
+        return None, []
+
+
+def _speichere_cache(model_name: str, cache_dir: str, vektoren, hashes):
+    npy_pfad, manifest_pfad = _cache_pfade(model_name, cache_dir)
+    os.makedirs(cache_dir, exist_ok=True)
+    # Erst temporär schreiben, dann atomar ersetzen – parallel startende Prozesse sehen nie halbe Dateien
+    tmp_npy = f"{npy_pfad}.{os.getpid()}.tmp"
+    tmp_manifest = f"{manifest_pfad}.{os.getpid()}.tmp"
+    with open(tmp_npy, "wb") as f:
+        np.save(f, vektoren)
+    with open(tmp_manifest, "w", encoding="utf-8") as f:
+        json.dump({"model": model_name, "dim": int(vektoren.shape[1]), "hashes": hashes}, f)
+    os.replace(tmp_npy, npy_pfad)
+    os.replace(tmp_manifest, manifest_pfad)
+
+
+def encode_faq_fragen(model, model_name: str, fragen, cache_dir: str = FAQ_CACHE_DIR):
+    # Liefert float32-Embeddings (Zeile i = fragen[i]); nur neue oder geänderte Fragen werden encodiert.
+    hashes = [frage_hash(f) for f in fragen]
+    alt, alt_hashes = _lade_cache(model_name, cache_dir)
+    alt_zeile = {h: i for i, h in enumerate(alt_hashes)}
+
+    fehlend = [i for i, h in enumerate(hashes) if h not in alt_zeile]
+    if alt is not None and not fehlend and hashes == alt_hashes:
+        logger.info(f"{len(fragen)} FAQ-Embeddings aus Cache geladen.")
+        return alt
+
+    if fehlend:
+        neu = model.encode([fragen[i] for i in fehlend], convert_to_numpy=True)
+        neu = np.asarray(neu, dtype=np.float32)
+        dim = neu.shape[1]
+    else:
+        neu = None
+        dim = alt.shape[1]
+
+    vektoren = np.empty((len(fragen), dim), dtype=np.float32)
+    for i, h in enumerate(hashes):
+        if h in alt_zeile:
+            vektoren[i] = alt[alt_zeile[h]]
+    for j, i in enumerate(fehlend):
+        vektoren[i] = neu[j]
+    logger.info(f"{len(fehlend)} von {len(fragen)} FAQ-Fragen neu encodiert.")
+
+    try:
+        _speichere_cache(model_name, cache_dir, vektoren, hashes)
+        return np.load(_cache_pfade(model_name, cache_dir)[0], mmap_mode="r")
+    except Exception as e:
+        logger.warning(f"FAQ-Embedding-Cache konnte nicht geschrieben werden: {e}")
+        return vektoren
@@ -0,0 +1,215 @@
+import hashlib
+import logging
+import os
+import threading
+import time
+
+import numpy as np
+
+logger = logging.getLogger("chatbot")
+
+# Speicherform der FAQ-Vektoren: float32 (exakt), float16 (halber Speicher) oder int8 (ein Viertel).
+# float16 ist beim Scoring deutlich langsamer (numpy wandelt float16 nur langsam nach float32).
+FAQ_INDEX_MODUS = os.getenv("FAQ_INDEX_MODUS", "float32")
+# Zeilen je Block, wenn quantisierte Vektoren für das Scoring nach float32 gewandelt werden
+FAQ_INDEX_BLOCK = int(os.getenv("FAQ_INDEX_BLOCK", "4096"))
+
+# Ablage für geteilte Index-Matrizen (leer = nur im Prozessspeicher); Dateiname ist der Inhalts-Hash
+FAQ_INDEX_DIR = os.getenv("FAQ_INDEX_DIR", os.path.join(".cache", "faq_index"))
+# Fremde Ablagedateien, die älter sind, werden beim Schreiben einer neuen Matrix entfernt
+FAQ_INDEX_AUFBEWAHRUNG_S = float(os.getenv("FAQ_INDEX_AUFBEWAHRUNG_S", "86400"))
+
+MODI = {"float32": np.float32, "float16": np.float16, "int8": np.int8}
+
+
+def normiere(vektoren):
+    # L2-Normierung je Zeile; danach ist das Skalarprodukt die Kosinus-Ähnlichkeit
+    v = np.atleast_2d(np.asarray(vektoren, dtype=np.float32))
+    return v / np.maximum(np.linalg.norm(v, axis=1, keepdims=True), 1e-12)
+
+
+def top_k(scores, k):
+    # Beste k Spalten je Zeile, absteigend; argpartition statt vollständiger Sortierung.
+    # Bei Gleichstand gewinnt die frühere Spalte (wie argmax).
+    n = scores.shape[1]
+    k = min(k, n)
+    if k == 0:
+        return np.zeros((len(scores), 0), dtype=np.int64)
+    if k == 1:
+        return scores.argmax(axis=1)[:, None]
+    teil = np.argpartition(-scores, k - 1, axis=1)[:, :k] if k < n else np.tile(np.arange(n), (len(scores), 1))
+    teil.sort(axis=1)
+    reihenfolge = np.argsort(-np.take_along_axis(scores, teil, axis=1), axis=1, kind="stable")
+    return np.take_along_axis(teil, reihenfolge, axis=1)
+
+
+class FaqVektorIndex:
+    # L2-normierte FAQ-Embeddings in einer zusammenhängenden Matrix; Scoring ist ein Matrix-Vektor-Produkt,
+    # die besten k kommen per argpartition. ids sind frei wählbare Ganzzahlen (z. B. Position in faq_data).
+    #
+    # Lesende Zugriffe arbeiten auf einem Schnappschuss (matrix, ids, n): hinzufuegen() schreibt nur hinter
+    # das Ende (oder in eine neue, größere Matrix), entfernen() baut eine neue Matrix auf.
+    # int8: ein gemeinsamer Skalierungsfaktor für den ganzen Index, kein Zusatzspeicher pro FAQ.
+
+    def __init__(self, dim, modus=FAQ_INDEX_MODUS, kapazitaet=64):
+        if modus not in MODI:
+            raise ValueError(f"Unbekannter FAQ-Index-Modus: {modus}")
+        self.dim = dim
+        self.modus = modus
+        self.skala = None  # int8: Betrag, der auf 127 abgebildet wird; aus den ersten Vektoren bestimmt
+        kapazitaet = max(kapazitaet, 1)
+        self._stand = (np.zeros((kapazitaet, dim), dtype=MODI[modus]), np.zeros(kapazitaet, dtype=np.int64), 0)
+        self._zeile = {}  # id -> Zeile
+        self._lock = threading.Lock()
+
+    @classmethod
+    def aus_vektoren(cls, vektoren, ids=None, modus=FAQ_INDEX_MODUS, ablage=None):
+        vektoren = normiere(vektoren)
+        index = cls(vektoren.shape[1], modus, kapazitaet=len(vektoren))
+        index.hinzufuegen(range(len(vektoren)) if ids is None else ids, vektoren)
+        if ablage:
+            index.teile(ablage)
+        return index
+
+    def teile(self, ordner=FAQ_INDEX_DIR) -> bool:
+        # Matrix in eine Datei schreiben und read-only per mmap einbinden: alle Prozesse mit demselben FAQ-Stand
+        # (uvicorn-/gunicorn-Worker) lesen dieselben Seiten aus dem Page-Cache statt je eine eigene Kopie.
+        # Spätere Änderungen (hinzufuegen/entfernen) legen wieder eine private Matrix an.
+        with self._lock:
+            matrix, id_array, n = self._stand
+            daten = np.ascontiguousarray(matrix[:n])
+            name = f"{hashlib.sha1(daten.tobytes()).hexdigest()[:16]}-{self.modus}-{self.dim}.npy"
+            pfad = os.path.join(ordner, name)
+            try:
+                if not os.path.exists(pfad):
+                    os.makedirs(ordner, exist_ok=True)
+                    tmp = f"{pfad}.{os.getpid()}.tmp"
+                    with open(tmp, "wb") as f:
+                        np.save(f, daten)
+                    os.replace(tmp, pfad)
+                    self._raeume_auf(ordner, name)
+                geteilt = np.load(pfad, mmap_mode="r")
+            except Exception as e:
+                logger.warning(f"FAQ-Index konnte nicht geteilt werden, bleibt im Prozessspeicher: {e}")
+                return False
+            self._stand = (geteilt, id_array[:n].copy(), n)
+            return True
+
+    @staticmethod
+    def _raeume_auf(ordner, behalten):
+        # Bereits eingebundene Dateien bleiben nach dem Löschen gültig (mmap hält sie offen)
+        grenze = time.time() - FAQ_INDEX_AUFBEWAHRUNG_S
+        for datei in os.listdir(ordner):
+            pfad = os.path.join(ordner, datei)
+            try:
+                if datei != behalten and datei.endswith(".npy") and os.path.getmtime(pfad) < grenze:
+                    os.remove(pfad)
+            except OSError:
+                pass
+
+    def __len__(self):
+        return self._stand[2]
+
+    def __contains__(self, id):
+        return id in self._zeile
+
+    @property
+    def ids(self):
+        matrix, ids, n = self._stand
+        return ids[:n].copy()
+
+    def _kodiere(self, vektoren):
+        if self.modus != "int8":
+            return vektoren.astype(MODI[self.modus])
+        if self.skala is None:
+            self.skala = float(np.abs(vektoren).max()) if vektoren.size else 1.0
+        # Spätere Vektoren mit größeren Komponenten werden auf die Skala abgeschnitten
+        return np.clip(np.rint(vektoren * (127 / self.skala)), -127, 127).astype(np.int8)
+
+    def hinzufuegen(self, ids, vektoren):
+        # Neue ids werden angehängt; vorhandene ids werden ersetzt
+        ids = [int(i) for i in ids]
+        vektoren = normiere(vektoren) if len(ids) else np.zeros((0, self.dim), dtype=np.float32)
+        if vektoren.shape != (len(ids), self.dim):
+            raise ValueError(f"Erwartet {len(ids)} Vektoren der Länge {self.dim}, erhalten {vektoren.shape}")
+        if len(set(ids)) != len(ids):
+            raise ValueError("Doppelte ids in einem Aufruf")
+        with self._lock:
+            self._entfernen([i for i in ids if i in self._zeile])
+            codes = self._kodiere(vektoren)
+            matrix, id_array, n = self._stand
+            bedarf = n + len(ids)
+            if bedarf > len(matrix):
+                kapazitaet = max(bedarf, 2 * len(matrix))
+                neu = np.zeros((kapazitaet, self.dim), dtype=matrix.dtype)
+                neu[:n] = matrix[:n]
+                neu_ids = np.zeros(kapazitaet, dtype=np.int64)
+                neu_ids[:n] = id_array[:n]
+                matrix, id_array = neu, neu_ids
+            matrix[n:bedarf] = codes
+            id_array[n:bedarf] = ids
+            for z, i in enumerate(ids, start=n):
+                self._zeile[i] = z
+            self._stand = (matrix, id_array, bedarf)
+
+    def entfernen(self, ids):
+        # Liefert die Anzahl tatsächlich entfernter Einträge; unbekannte ids werden ignoriert
+        with self._lock:
+            return self._entfernen([int(i) for i in ids if int(i) in self._zeile])
+
+    def _entfernen(self, ids):
+        if not ids:
+            return 0
+        matrix, id_array, n = self._stand
+        behalten = np.ones(n, dtype=bool)
+        behalten[[self._zeile.pop(i) for i in ids]] = False
+        rest = n - len(ids)
+        neu = np.zeros(matrix.shape, dtype=matrix.dtype)
+        neu[:rest] = matrix[:n][behalten]
+        neu_ids = np.zeros_like(id_array)
+        neu_ids[:rest] = id_array[:n][behalten]
+        self._zeile = {int(i): z for z, i in enumerate(neu_ids[:rest])}
+        self._stand = (neu, neu_ids, rest)
+        return len(ids)
+
+    def scores(self, anfragen):
+        # Kosinus-Ähnlichkeit (m x n) der Anfragen gegen alle Einträge, Spalten in Reihenfolge von self.ids
+        return self._scores(self._stand, anfragen)
+
+    def _scores(self, stand, anfragen):
+        matrix, _, n = stand
+        anfragen = normiere(anfragen)
+        if self.modus == "float32":
+            return anfragen @ matrix[:n].T
+        ergebnis = np.empty((len(anfragen), n), dtype=np.float32)
+        for start in range(0, n, FAQ_INDEX_BLOCK):
+            ende = min(start + FAQ_INDEX_BLOCK, n)
+            ergebnis[:, start:ende] = anfragen @ matrix[start:ende].astype(np.float32).T
+        if self.modus == "int8":
+            ergebnis *= self.skala / 127
+        return ergebnis
+
+    def suche_batch(self, anfragen, k=1):
+        # (ids, scores), beide m x k und je Zeile absteigend nach Score
+        stand = self._stand
+        id_array, n = stand[1], stand[2]
+        scores = self._scores(stand, anfragen)
+        spalten = top_k(scores, k)
+        return id_array[:n][spalten], np.take_along_axis(scores, spalten, axis=1)
+
+    def suche(self, anfrage, k=1):
+        # (ids, scores) der besten k Einträge für einen Vektor, absteigend nach Score
+        ids, scores = self.suche_batch(anfrage, k)
+        return ids[0], scores[0]
+
+    def stats(self):
+        matrix, _, n = self._stand
+        return {
+            "anzahl": n,
+            "dim": self.dim,
+            "modus": self.modus,
+            "geteilt": isinstance(matrix, np.memmap),
+            "bytes_pro_faq": self.dim * matrix.itemsize,
+            "bytes": n * self.dim * matrix.itemsize,
+            "kapazitaet": len(matrix),
+        }
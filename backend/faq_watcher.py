@@ -0,0 +1,131 @@
+import hashlib
+import io
+import logging
+import os
+import threading
+import time
+
+from metriken import METRIKEN
+
+logger = logging.getLogger("chatbot")
+
+FAQ_RELOAD_INTERVAL = float(os.getenv("FAQ_RELOAD_INTERVAL", "30"))
+
+FAQ_PRUEFUNGEN = METRIKEN.zaehler("chatbot_faq_pruefungen_total", "Prüfungen des FAQ-Ordners nach Ergebnis", ("ergebnis",))
+
+
+def parse_faq(text):
+    # "Frage: ..." gefolgt von "Antwort: ..."; liefert [(frage, antwort), ...] in Dateireihenfolge
+    daten = []
+    frage, antwort = "", ""
+    for zeile in io.StringIO(text, newline=None):
+        if zeile.startswith("Frage:"):
+            frage = zeile.replace("Frage:", "").strip()
+        elif zeile.startswith("Antwort:"):
+            antwort = zeile.replace("Antwort:", "").strip()
+            if frage and antwort:
+                daten.append((frage, antwort))
+                frage, antwort = "", ""
+    return daten
+
+
+class FaqWatcher:
+    # Prüft den FAQ-Ordner periodisch: mtime und Größe je .txt-Datei, bei Abweichung SHA-1 des Inhalts.
+    # Nur geänderte Dateien werden neu gelesen und geparst; ändert sich etwas, bekommt on_update die komplette
+    # neue FAQ-Liste (Dateien in os.listdir-Reihenfolge). Schlägt on_update fehl, bleibt der alte Stand aktiv
+    # und die Änderung wird bei der nächsten Prüfung erneut versucht.
+
+    def __init__(self, faq_dir, on_update, interval=FAQ_RELOAD_INTERVAL):
+        self.faq_dir = faq_dir
+        self.on_update = on_update
+        self.interval = interval
+        self._dateien = None  # Dateiname -> (mtime_ns, Größe, SHA-1, Einträge); None vor der ersten Prüfung
+        self.generation = 0
+        self.geprueft_um = None
+        self.aktualisiert_um = None
+        self.letzter_fehler = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _lies(self, pfad, alt):
+        info = os.stat(pfad)
+        if alt is not None and (info.st_mtime_ns, info.st_size) == alt[:2]:
+            return alt
+        with open(pfad, "rb") as f:
+            inhalt = f.read()
+        sha1 = hashlib.sha1(inhalt).hexdigest()
+        if alt is not None and sha1 == alt[2]:
+            return (info.st_mtime_ns, info.st_size, sha1, alt[3])
+        return (info.st_mtime_ns, info.st_size, sha1, parse_faq(inhalt.decode("utf-8")))
+
+    def pruefe(self) -> bool:
+        # True, wenn eine neue FAQ-Liste veröffentlicht wurde
+        with self._lock:
+            alt = self._dateien or {}
+            neu = {}
+            if os.path.isdir(self.faq_dir):
+                for datei in os.listdir(self.faq_dir):
+                    if not datei.endswith(".txt"):
+                        continue
+                    try:
+                        neu[datei] = self._lies(os.path.join(self.faq_dir, datei), alt.get(datei))
+                    except Exception as e:
+                        # Nicht lesbare Datei: bisherigen Stand behalten (z. B. während ein Editor speichert)
+                        logger.error(f"FAQ-Datei {datei} nicht lesbar, alter Stand bleibt aktiv: {e}")
+                        self.letzter_fehler = str(e)
+                        if datei in alt:
+                            neu[datei] = alt[datei]
+            elif self._dateien is None or alt:
+                logger.warning("FAQ-Ordner fehlt.")
+            self.geprueft_um = time.time()
+
+            if self._dateien is not None and [(d, e[2]) for d, e in neu.items()] == [(d, e[2]) for d, e in alt.items()]:
+                self._dateien = neu  # neue mtimes übernehmen, Inhalt unverändert
+                FAQ_PRUEFUNGEN.erhoehe("unveraendert")
+                return False
+
+            geaendert = [d for d in neu if d not in alt or neu[d][2] != alt[d][2]]
+            entfernt = [d for d in alt if d not in neu]
+            faq_data = [eintrag for d in neu.values() for eintrag in d[3]]
+            try:
+                self.on_update(faq_data)
+            except Exception as e:
+                self.letzter_fehler = str(e)
+                logger.error(f"FAQ-Aktualisierung fehlgeschlagen, alter Stand bleibt aktiv: {e}")
+                FAQ_PRUEFUNGEN.erhoehe("fehler")
+                return False
+            if self._dateien is not None:
+                logger.info(
+                    f"FAQ neu geladen: {len(geaendert)} Dateien geändert/neu, {len(entfernt)} entfernt, "
+                    f"{len(faq_data)} Einträge."
+                )
+            self._dateien = neu
+            self.generation += 1
+            self.aktualisiert_um = time.time()
+            self.letzter_fehler = None
+            FAQ_PRUEFUNGEN.erhoehe("aktualisiert")
+            return True
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            self.pruefe()
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, name="faq-watcher", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def status(self):
+        return {
+            "ordner": self.faq_dir,
+            "dateien": len(self._dateien or {}),
+            "generation": self.generation,
+            "alter_s": round(time.time() - self.geprueft_um, 1) if self.geprueft_um else None,
+            "daten_alter_s": round(time.time() - self.aktualisiert_um, 1) if self.aktualisiert_um else None,
+            "fehler": self.letzter_fehler,
+        }
@@ -0,0 +1,71 @@
+import logging
+import xml.etree.ElementTree as ET
+from contextlib import contextmanager
+
+import http_client
+from feed_refresher import FEED_TIMEOUT
+
+logger = logging.getLogger("chatbot")
+
+SITEMAP_NS = "{http://www.sitemaps.org/schemas/sitemap/0.9}"
+MAX_SITEMAP_TIEFE = 3
+
+
+@contextmanager
+def oeffne_stream(url, timeout=FEED_TIMEOUT):
+    # HTTP-Antwort als Datei-Objekt, das iterparse stückweise liest (gzip wird transparent entpackt);
+    # über die gemeinsame Session (Keep-Alive, Retries), timeout ist der Read-Timeout
+    with http_client.get(url, stream=True, timeout=timeout) as r:
+        r.raise_for_status()
+        r.raw.decode_content = True
+        yield r.raw
+
+
+def iter_elemente(quelle, tags):
+    # Liefert jedes fertig geparste Element mit einem der Tags und räumt es danach weg,
+    # damit der Speicher unabhängig von der Dokumentgröße bleibt. quelle: Pfad oder Datei-Objekt.
+    root = None
+    for event, elem in ET.iterparse(quelle, events=("start", "end")):
+        if root is None:
+            root = elem
+        if event == "end" and elem.tag in tags:
+            yield elem
+            elem.clear()
+            root.clear()
+
+
+def iter_sitemap_locs(quelle, oeffne=oeffne_stream, tiefe=0):
+    # <urlset> liefert die <loc>-Einträge direkt, bei <sitemapindex> werden die Kind-Sitemaps gefolgt
+    kinder = []
+    for elem in iter_elemente(quelle, {SITEMAP_NS + "url", SITEMAP_NS + "sitemap"}):
+        loc = (elem.findtext(SITEMAP_NS + "loc") or "").strip()
+        if not loc:
+            continue
+        if elem.tag == SITEMAP_NS + "url":
+            yield loc
+        else:
+            kinder.append(loc)
+
+    for kind_url in kinder:
+        if tiefe >= MAX_SITEMAP_TIEFE:
+            logger.warning(f"Sitemap-Index zu tief verschachtelt, überspringe {kind_url}")
+            continue
+        # Fehler in einer Kind-Sitemap brechen den ganzen Abruf ab, statt nur einen Teil der Jobs zu liefern
+        with oeffne(kind_url) as stream:
+            yield from iter_sitemap_locs(stream, oeffne, tiefe + 1)
+
+
+def parse_job_urls(quelle, oeffne=oeffne_stream):
+    job_urls = {}
+    for url in iter_sitemap_locs(quelle, oeffne):
+        slug = url.rstrip("/").split("/")[-1]
+
+        # Skip Hauptseite /jobs/
+        if slug == "jobs":
+            continue
+
+        teile = slug.split("-")
+        if teile:
+            ort = teile[-1].lower()
+            job_urls.setdefault(ort, []).append(url)
+    return job_urls
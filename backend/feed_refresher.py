@@ -0,0 +1,106 @@
+import logging
+import os
+import threading
+import time
+
+import http_client
+from metriken import METRIKEN
+
+logger = logging.getLogger("chatbot")
+
+FEED_REFRESH_INTERVAL = float(os.getenv("FEED_REFRESH_INTERVAL", "900"))
+FEED_TIMEOUT = float(os.getenv("FEED_TIMEOUT", "10"))
+
+FEED_DAUER = METRIKEN.histogramm(
+    "chatbot_feed_dauer_seconds", "Feed-Abruf inkl. Streaming-Parse (abruf) bzw. Aufbau der Indizes (aufbau)",
+    ("feed", "phase")
+)
+FEED_ABRUFE = METRIKEN.zaehler("chatbot_feed_abrufe_total", "Feed-Abrufe nach Ergebnis", ("feed", "ergebnis"))
+
+
+class FeedRefresher:
+    # Lädt einen Feed periodisch per bedingtem GET (ETag / If-Modified-Since) neu.
+    # parse(datei_objekt) baut die neuen Daten komplett auf, erst danach übergibt on_update sie in einem Schritt.
+    # Schlägt Abruf, Parsen oder on_update fehl oder ist der Feed leer, bleiben die alten Daten aktiv.
+
+    def __init__(self, name, url, parse, on_update, interval=FEED_REFRESH_INTERVAL, timeout=FEED_TIMEOUT):
+        self.name = name
+        self.url = url
+        self.parse = parse
+        self.on_update = on_update
+        self.interval = interval
+        self.timeout = timeout
+        self.etag = None
+        self.last_modified = None
+        self.generation = 0
+        self.geladen_um = None
+        self.aktualisiert_um = None  # letzter Abruf mit neuen Daten (304 zählt nicht)
+        self.letzter_fehler = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def fetch_once(self) -> bool:
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        start = time.perf_counter()
+        try:
+            # Antwort wird gestreamt; parse liest sie stückweise (iterparse) statt als Ganzes.
+            # Gemeinsame Session: Keep-Alive zum Feed-Host, Retries mit Jitter bei Verbindungsfehlern und 5xx
+            with http_client.get(self.url, headers=headers, timeout=self.timeout, stream=True) as r:
+                if r.status_code == 304:
+                    logger.info(f"{self.name}: unverändert (304).")
+                    self.geladen_um = time.time()
+                    FEED_DAUER.beobachte(time.perf_counter() - start, self.name, "abruf")
+                    FEED_ABRUFE.erhoehe(self.name, "unveraendert")
+                    return False
+                r.raise_for_status()
+                r.raw.decode_content = True
+                daten = self.parse(r.raw)
+            if not daten:
+                # Ein leerer Feed ist eher ein Fehler beim Anbieter als "keine Standorte/Jobs mehr"
+                raise ValueError("Feed ohne Einträge")
+            FEED_DAUER.beobachte(time.perf_counter() - start, self.name, "abruf")
+            # Indexaufbau im selben try: scheitert er, bleiben die alten Daten aktiv und der Poll-Thread lebt weiter
+            with FEED_DAUER.zeit(self.name, "aufbau"):
+                self.on_update(daten)
+        except Exception as e:
+            self.letzter_fehler = str(e)
+            logger.error(f"{self.name}: Aktualisierung fehlgeschlagen, alte Daten bleiben aktiv: {e}")
+            FEED_ABRUFE.erhoehe(self.name, "fehler")
+            return False
+        self.etag = r.headers.get("ETag")
+        self.last_modified = r.headers.get("Last-Modified")
+        self.generation += 1
+        self.geladen_um = self.aktualisiert_um = time.time()
+        self.letzter_fehler = None
+        FEED_ABRUFE.erhoehe(self.name, "aktualisiert")
+        return True
+
+    def _loop(self):
+        # Noch nie geladen: erster Abruf sofort, danach im Intervall
+        if self.geladen_um is None:
+            self.fetch_once()
+        while not self._stop.wait(self.interval):
+            self.fetch_once()
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, name=f"refresh-{self.name}", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def status(self):
+        return {
+            "url": self.url,
+            "generation": self.generation,
+            "alter_s": round(time.time() - self.geladen_um, 1) if self.geladen_um else None,
+            "daten_alter_s": round(time.time() - self.aktualisiert_um, 1) if self.aktualisiert_um else None,
+            "etag": self.etag,
+            "fehler": self.letzter_fehler,
+        }
@@ -0,0 +1,157 @@
+import os
+
+import numpy as np
+from rapidfuzz import fuzz, process
+
+# Anzahl Threads für rapidfuzz.process.cdist (-1 = alle Kerne)
+FUZZY_WORKERS = int(os.getenv("FUZZY_WORKERS", "1"))
+
+BERUFS_BOOSTS = ("ergo", "physio", "logo")
+
+
+def _cdist_matrix(fragen, choices, scorer, workers):
+    if not len(choices) or not len(fragen):
+        return np.zeros((len(fragen), len(choices)), dtype=np.float64)
+    return process.cdist(fragen, choices, scorer=scorer, dtype=np.float64, workers=workers)
+
+
+def _cdist(frage, choices, scorer, workers):
+    return _cdist_matrix([frage], choices, scorer, workers)[0]
+
+
+class StandortScorer:
+    # Bewertungsregeln aus backend/chat_backend.py: token_set_ratio + Titel-, Alias- und Berufs-Boosts
+
+    def __init__(self, standorte, workers=FUZZY_WORKERS):
+        self.workers = workers
+        self.suchtexte = [
+            " ".join([s.stadt, s.adresse, s.title, s.primary_category]).lower().replace("-", " ")
+            for s in standorte
+        ]
+        self.titel = np.array([s.title_lower for s in standorte], dtype=str)
+
+        alias_liste, besitzer = [], []
+        for i, s in enumerate(standorte):
+            for alias in s.aliases:
+                alias_liste.append(alias)
+                besitzer.append(i)
+        self.aliases = np.array(alias_liste, dtype=str)
+        self.alias_besitzer = np.array(besitzer, dtype=np.intp)
+
+        self.beruf_im_suchtext = {
+            k: np.array([k in t for t in self.suchtexte], dtype=bool) for k in BERUFS_BOOSTS
+        }
+
+    def scores(self, frage, ids=None):
+        ids, score = self.scores_batch([frage], ids)
+        return ids, score[0]
+
+    def scores_batch(self, fragen, ids=None):
+        # Alle Fragen gegen dieselben Kandidaten: ein cdist-Aufruf liefert die Matrix (Frage x Standort)
+        fragen_lc = [f.lower() for f in fragen]
+        fragen_clean = [f.replace("-", " ").replace(",", " ").strip() for f in fragen_lc]
+        if ids is None:
+            ids = np.arange(len(self.suchtexte))
+        else:
+            ids = np.asarray(ids, dtype=np.intp)
+
+        score = _cdist_matrix(fragen_clean, [self.suchtexte[i] for i in ids], fuzz.token_set_ratio, self.workers)
+        for zeile, (frage_lc, frage_clean) in enumerate(zip(fragen_lc, fragen_clean)):
+            score[zeile] += self._boosts(frage_lc, frage_clean, ids)
+        return ids, score
+
+    def _boosts(self, frage_lc, frage_clean, ids):
+        score = np.zeros(len(ids), dtype=np.float64)
+
+        # 1. Titel-Kompletttreffer
+        titel_treffer = np.ones(len(ids), dtype=bool)
+        for w in frage_clean.split():
+            titel_treffer &= np.char.find(self.titel[ids], w) >= 0
+        score += 10 * titel_treffer
+
+        # 2. Alias-Treffer (irgendein Alias des Standorts kommt in der Frage vor)
+        if len(self.aliases):
+            alias_treffer = np.char.find(frage_clean, self.aliases) >= 0
+            hat_alias = np.bincount(self.alias_besitzer[alias_treffer], minlength=len(self.suchtexte)) > 0
+            score += 15 * hat_alias[ids]
+
+        # 3. Berufs-Keywords
+        for k in BERUFS_BOOSTS:
+            if k in frage_lc:
+                score += 10 * self.beruf_im_suchtext[k][ids]
+
+        return score
+
+    def bester(self, frage, ids=None, schwelle=70):
+        ids, score = self.scores(frage, ids)
+        return self.waehle(ids, score, schwelle)
+
+    @staticmethod
+    def waehle(ids, score, schwelle=70):
+        if not len(ids):
+            return None
+        best = int(np.argmax(score))
+        if score[best] > schwelle:
+            return int(ids[best])
+        return None
+
+
+class StandortScorerPartial:
+    # Bewertungsregeln aus chatbot.py: max(partial_ratio) über Name, Stadt, Titel und Kategorie
+
+    # Name und Titel sind beide der <title> des Standorts; die Reihenfolge bestimmt die Zeilen in scores()
+    FELDER = ("title", "stadt", "title", "primary_category")
+
+    def __init__(self, standorte, workers=FUZZY_WORKERS):
+        self.workers = workers
+        self.anzahl = len(standorte)
+        # Feld-Blöcke hintereinander: [alle Namen, alle Städte, alle Titel, alle Kategorien]
+        self.choices = [getattr(s, feld).lower() for feld in self.FELDER for s in standorte]
+        self.kategorie = [s.primary_category for s in standorte]
+        self.beruf_in_kategorie = {
+            k: np.array([k in kat for kat in self.kategorie], dtype=bool) for k in BERUFS_BOOSTS
+        }
+
+    def scores(self, frage):
+        frage_lc = frage.lower()
+        felder = _cdist(frage_lc, self.choices, fuzz.partial_ratio, self.workers).reshape(len(self.FELDER), self.anzahl)
+        score_name, score_stadt = felder[0], felder[1]
+
+        # Grundscore
+        score = felder.max(axis=0) if self.anzahl else np.zeros(0)
+
+        # Bonus bei kombinierten Treffern
+        score += 10 * ((score_name > 70) & (score_stadt > 70))
+
+        # Bonus für exakte Berufsbezeichnung (if/elif-Kette: höchstens einmal pro Standort)
+        bonus = np.zeros(self.anzahl, dtype=bool)
+        for k in BERUFS_BOOSTS:
+            if k in frage_lc:
+                bonus |= self.beruf_in_kategorie[k]
+        score += 15 * bonus
+
+        return score
+
+    def bester(self, frage, schwelle=80):
+        if not self.anzahl:
+            return None
+        score = self.scores(frage)
+        best = int(np.argmax(score))
+        if score[best] >= schwelle:
+            return best
+        return None
+
+
+class OrtScorer:
+    # Ersatz für process.extractOne(frage, orte, scorer=fuzz.partial_ratio) mit vorberechneter Ortsliste
+
+    def __init__(self, orte, workers=FUZZY_WORKERS):
+        self.workers = workers
+        self.orte = list(orte)
+
+    def bester(self, frage):
+        if not self.orte:
+            return None, 0
+        score = _cdist(frage, self.orte, fuzz.partial_ratio, self.workers)
+        best = int(np.argmax(score))
+        return self.orte[best], score[best]
@@ -0,0 +1,71 @@
+import math
+from heapq import heappush, heapreplace
+
+ERDRADIUS_KM = 6371.0088
+
+
+def _einheitsvektor(lat, lon):
+    # Punkt auf der Einheitskugel: die Sehnenlänge wächst monoton mit der Haversine-Distanz,
+    # deshalb liefert eine euklidische Nachbarsuche in 3D dieselbe Reihenfolge wie Großkreis-Abstände.
+    la, lo = math.radians(lat), math.radians(lon)
+    return (math.cos(la) * math.cos(lo), math.cos(la) * math.sin(lo), math.sin(la))
+
+
+def _km(sehne2):
+    return 2 * ERDRADIUS_KM * math.asin(min(1.0, math.sqrt(sehne2) / 2))
+
+
+class GeoIndex:
+    # KD-Baum über die Standort-Koordinaten, einmal beim Laden aufgebaut.
+    # Einträge: (id, lat, lon); Einträge ohne Koordinaten werden ignoriert.
+
+    def __init__(self, eintraege):
+        punkte = [
+            (_einheitsvektor(lat, lon), id)
+            for id, lat, lon in eintraege
+            if lat is not None and lon is not None
+        ]
+        self.anzahl = len(punkte)
+        self._wurzel = self._baue(punkte, 0)
+
+    def _baue(self, punkte, tiefe):
+        if not punkte:
+            return None
+        achse = tiefe % 3
+        punkte.sort(key=lambda p: p[0][achse])
+        mitte = len(punkte) // 2
+        return (
+            punkte[mitte],
+            achse,
+            self._baue(punkte[:mitte], tiefe + 1),
+            self._baue(punkte[mitte + 1:], tiefe + 1)
+        )
+
+    def naechste(self, lat, lon, k=5, filter=None):
+        # Die k nächsten Einträge als [(id, entfernung_km)], aufsteigend sortiert.
+        # filter(id) -> bool schließt Einträge aus, ohne den Baum neu aufzubauen.
+        if k <= 0:
+            return []
+        ziel = _einheitsvektor(lat, lon)
+        heap = []  # (-abstand², id), größter Abstand oben
+
+        def suche(knoten):
+            if knoten is None:
+                return
+            (punkt, id), achse, links, rechts = knoten
+            d2 = (punkt[0] - ziel[0]) ** 2 + (punkt[1] - ziel[1]) ** 2 + (punkt[2] - ziel[2]) ** 2
+            if filter is None or filter(id):
+                if len(heap) < k:
+                    heappush(heap, (-d2, id))
+                elif d2 < -heap[0][0]:
+                    heapreplace(heap, (-d2, id))
+
+            diff = ziel[achse] - punkt[achse]
+            nah, fern = (links, rechts) if diff < 0 else (rechts, links)
+            suche(nah)
+            # Andere Seite nur betreten, wenn die Trennebene näher liegt als der bisher k-te Treffer
+            if len(heap) < k or diff * diff < -heap[0][0]:
+                suche(fern)
+
+        suche(self._wurzel)
+        return [(id, _km(-d2)) for d2, id in sorted(heap, reverse=True)]
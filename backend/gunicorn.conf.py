@@ -0,0 +1,29 @@
+# Preload-Modus für mehrere Worker: gunicorn -c gunicorn.conf.py chat_backend:app
+# Der Master importiert chat_backend, lädt Modell, FAQ-Index und Feeds (vorladen) und forkt erst dann die Worker.
+# So liegen Modellgewichte und Indizes einmal im Speicher statt einmal pro Worker wie bei uvicorn --workers.
+import gc
+import os
+
+# Der Rust-Tokenizer startet sonst eigene Threads im Master, die in den Workern fehlen
+os.environ.setdefault("TOKENIZERS_PARALLELISM", "false")
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+workers = int(os.getenv("WEB_CONCURRENCY", "2"))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "120"))
+# Torch-Threads je Worker; Standard: Kerne gleichmäßig auf die Worker verteilt
+torch_threads = int(os.getenv("TORCH_THREADS", "0")) or max(1, (os.cpu_count() or 1) // workers)
+
+
+def when_ready(server):
+    import chat_backend
+    chat_backend.vorladen()
+    # Geladene Objekte aus der Garbage Collection nehmen: sonst schreibt der GC in den Workern
+    # in ihre Seiten und hebt das Teilen auf
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    import chat_backend
+    chat_backend.nach_fork(torch_threads)
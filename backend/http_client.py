@@ -0,0 +1,88 @@
+import os
+import random
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# HTTP-Client für Feed-Abrufe: eine Session pro Prozess mit Verbindungspool (Keep-Alive, kein neuer
+# TCP-/TLS-Handshake pro Anfrage), Connect-/Read-Timeouts und Retries mit Jitter.
+# Das Frontend hat einen eigenen Client (frontend/backend_client.py), der 503 vom Backend nicht wiederholt.
+
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "3.05"))
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "10"))
+HTTP_RETRIES = int(os.getenv("HTTP_RETRIES", "2"))
+HTTP_BACKOFF = float(os.getenv("HTTP_BACKOFF", "0.3"))
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "10"))
+# Antworten gzip-/deflate-komprimiert anfordern; requests bzw. urllib3 entpacken transparent
+HTTP_KOMPRESSION = os.getenv("HTTP_KOMPRESSION", "1") != "0"
+
+# Nur idempotente Methoden werden wiederholt; bei 429/503 der Feed-Hosts gilt ein Retry-After des Servers
+RETRY_STATUS = (429, 500, 502, 503, 504)
+
+
+class JitterRetry(Retry):
+    # Exponentielles Backoff mit "full jitter": gleichzeitig gescheiterte Clients verteilen ihre Wiederholungen
+
+    def get_backoff_time(self):
+        basis = super().get_backoff_time()
+        return random.uniform(0, basis) if basis > 0 else 0
+
+
+def timeouts(timeout=None):
+    # None → Standard; Zahl → Read-Timeout mit Standard-Connect-Timeout; Tupel → (connect, read) unverändert
+    if timeout is None:
+        return (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT)
+    if isinstance(timeout, (int, float)):
+        return (HTTP_CONNECT_TIMEOUT, timeout)
+    return timeout
+
+
+def neue_session(retries=HTTP_RETRIES, backoff=HTTP_BACKOFF, pool_size=HTTP_POOL_SIZE, kompression=HTTP_KOMPRESSION):
+    retry = JitterRetry(
+        total=retries,
+        connect=retries,
+        read=retries,
+        status=retries,
+        backoff_factor=backoff,
+        status_forcelist=RETRY_STATUS,
+        allowed_methods=frozenset({"GET", "HEAD"}),
+        respect_retry_after_header=True,
+        raise_on_status=False,  # letzte Antwort zurückgeben; raise_for_status() meldet den echten Status
+    )
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers["Accept-Encoding"] = "gzip, deflate" if kompression else "identity"
+    return session
+
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def hole_session() -> requests.Session:
+    # Eine Session pro Prozess, erst beim ersten Abruf angelegt
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = neue_session()
+    return _session
+
+
+def _nach_fork():
+    # Gepoolte Sockets des Elternprozesses nicht weiterverwenden (gunicorn --preload)
+    global _session, _session_lock
+    _session = None
+    _session_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_nach_fork)
+
+
+def get(url, timeout=None, **kwargs) -> requests.Response:
+    return hole_session().get(url, timeout=timeouts(timeout), **kwargs)
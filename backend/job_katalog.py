@@ -0,0 +1,75 @@
+from dataclasses import dataclass
+
+from fuzzy_engine import OrtScorer
+from keyword_automat import KeywordAutomat
+from textnorm import normalisiere
+
+
+@dataclass(slots=True)
+class Job:
+    url: str
+    ort: str
+    titel: str
+    berufe: frozenset
+
+
+class JobKatalog:
+    # Job-Datensätze einmal beim Einlesen der Sitemap aufgebaut: Titel vorberechnet,
+    # Orte und Berufe als invertierte Indizes (-> Job-IDs in Sitemap-Reihenfolge).
+    #
+    # berufsfilter: {beruf: [begriffe]}; ein Job gehört zu einem Beruf, wenn einer der Begriffe
+    # in der URL vorkommt. normalisiert=True vergleicht umlaut-gefaltet gegen den Slug (chatbot.py),
+    # sonst kleingeschrieben gegen die ganze URL (chat_backend.py).
+
+    def __init__(self, job_urls, berufsfilter, titel=None, normalisiert=False):
+        self.job_urls = job_urls
+        self.normalisiert = normalisiert
+        self.begriffe = {k: [self._norm(t) for t in terms] for k, terms in berufsfilter.items()}
+        # Alle Berufsbegriffe in einem Automaten: ein Durchlauf pro URL bzw. Frage statt any() je Beruf
+        self.automat = KeywordAutomat(self.begriffe, norm=self._norm)
+        self.jobs = []
+        self.nach_ort = {}
+        self.nach_beruf = {k: set() for k in berufsfilter}
+
+        for ort, urls in job_urls.items():
+            ids = []
+            for url in urls:
+                i = len(self.jobs)
+                text = self._norm(url.rstrip("/").split("/")[-1]) if normalisiert else url.lower()
+                berufe = frozenset(self.automat.scan(text).gruppen())
+                for k in berufe:
+                    self.nach_beruf[k].add(i)
+                self.jobs.append(Job(url, ort, titel(url) if titel else url, berufe))
+                ids.append(i)
+            self.nach_ort[ort] = ids
+
+        self.ort_scorer = OrtScorer(job_urls.keys())
+
+    def _norm(self, text):
+        return normalisiere(text) if self.normalisiert else text.lower()
+
+    def berufe_in_frage(self, frage):
+        treffer = self.automat.scan(frage)
+        return [k for k in self.begriffe if treffer.hat(k)]
+
+    def ort_in_frage(self, frage, schwelle=80):
+        ort, score = self.ort_scorer.bester(frage.lower())
+        return ort if score >= schwelle else None
+
+    def filter(self, ort=None, berufe=()):
+        # Ohne Ort: alle Jobs; ohne Berufe: alle Jobs des Orts. Ergebnis in Sitemap-Reihenfolge.
+        ids = self.nach_ort.get(ort, []) if ort is not None else None
+        if berufe:
+            erlaubt = set().union(*(self.nach_beruf.get(k, ()) for k in berufe))
+            if ids is not None:
+                erlaubt = erlaubt.intersection(ids)
+            return [self.jobs[i] for i in sorted(erlaubt)]
+        if ids is None:
+            return list(self.jobs)
+        return [self.jobs[i] for i in ids]
+
+    def suche(self, frage, berufe=None):
+        # berufe: bereits erkannte Berufe (z. B. aus dem gemeinsamen Intent-Scan), sonst aus der Frage
+        if berufe is None:
+            berufe = self.berufe_in_frage(frage)
+        return self.filter(self.ort_in_frage(frage), berufe)
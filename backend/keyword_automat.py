@@ -0,0 +1,81 @@
+from collections import deque
+
+
+class KeywordTreffer:
+    # Ergebnis eines Scans: alle Treffer als (startposition, gruppe, stichwort), nach Position sortiert
+
+    def __init__(self, text, hits):
+        self.text = text
+        self.hits = sorted(hits)
+        self._erste = {}
+        self._woerter = {}
+        for pos, gruppe, wort in self.hits:
+            self._erste.setdefault(gruppe, pos)
+            self._woerter.setdefault(gruppe, set()).add(wort)
+
+    def hat(self, gruppe) -> bool:
+        return gruppe in self._erste
+
+    def position(self, gruppe):
+        # Wie min(text.find(w) für alle Treffer-Wörter der Gruppe); inf wenn keins vorkommt
+        return self._erste.get(gruppe, float("inf"))
+
+    def woerter(self, gruppe):
+        return self._woerter.get(gruppe, set())
+
+    def gruppen(self, praefix=""):
+        return [g for g in self._erste if g.startswith(praefix)]
+
+
+class KeywordAutomat:
+    # Aho-Corasick über alle Stichwortlisten: ein Durchlauf über die Frage findet jedes Vorkommen
+    # jedes Stichworts (Teilstring-Semantik wie `kw in text`), unabhängig von der Anzahl der Listen.
+    # vokabulare: {gruppe: [stichwörter]}; norm wird auf Stichwörter und Text angewandt.
+
+    def __init__(self, vokabulare, norm=str.lower):
+        self.norm = norm
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]
+
+        for gruppe, woerter in vokabulare.items():
+            for wort in woerter:
+                wort = norm(wort)
+                if not wort:
+                    continue
+                zustand = 0
+                for ch in wort:
+                    weiter = self._goto[zustand].get(ch)
+                    if weiter is None:
+                        weiter = len(self._goto)
+                        self._goto.append({})
+                        self._fail.append(0)
+                        self._out.append([])
+                        self._goto[zustand][ch] = weiter
+                    zustand = weiter
+                self._out[zustand].append((gruppe, wort))
+
+        # Fehlerlinks per Breitensuche; Ausgaben der Fehlerzustände werden übernommen
+        warteschlange = deque(self._goto[0].values())
+        while warteschlange:
+            zustand = warteschlange.popleft()
+            for ch, weiter in self._goto[zustand].items():
+                warteschlange.append(weiter)
+                f = self._fail[zustand]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                self._fail[weiter] = self._goto[f].get(ch, 0)
+                self._out[weiter] = self._out[weiter] + self._out[self._fail[weiter]]
+
+    def scan(self, text) -> KeywordTreffer:
+        text = self.norm(text)
+        goto, fail, out = self._goto, self._fail, self._out
+        zustand = 0
+        hits = []
+        for i, ch in enumerate(text):
+            while zustand and ch not in goto[zustand]:
+                zustand = fail[zustand]
+            zustand = goto[zustand].get(ch, 0)
+            for gruppe, wort in out[zustand]:
+                hits.append((i - len(wort) + 1, gruppe, wort))
+        return KeywordTreffer(text, hits)
@@ -0,0 +1,158 @@
+import functools
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+# Bucket-Grenzen in Sekunden: fein im Sub-Millisekundenbereich (Stichworte, Caches), grob bis zum Feed-Abruf
+SEKUNDEN_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0
+)
+
+
+def _labels(namen, werte, extra=()):
+    paare = list(zip(namen, werte)) + list(extra)
+    if not paare:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in paare) + "}"
+
+
+def _escape(wert):
+    return str(wert).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _zahl(wert):
+    return "+Inf" if wert == float("inf") else repr(float(wert))
+
+
+class Histogramm:
+    # Kumulative Buckets wie bei Prometheus; pro Beobachtung ein Lock und eine Binärsuche
+
+    def __init__(self, name, hilfe, labels=(), buckets=SEKUNDEN_BUCKETS):
+        self.name = name
+        self.hilfe = hilfe
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._reihen = {}  # Labelwerte -> [Zähler je Bucket (+Inf zuletzt), Summe, Anzahl]
+        self._lock = threading.Lock()
+
+    def beobachte(self, wert, *labelwerte):
+        i = bisect_left(self.buckets, wert)
+        with self._lock:
+            reihe = self._reihen.get(labelwerte)
+            if reihe is None:
+                reihe = self._reihen[labelwerte] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            reihe[0][i] += 1
+            reihe[1] += wert
+            reihe[2] += 1
+
+    @contextmanager
+    def zeit(self, *labelwerte):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.beobachte(time.perf_counter() - start, *labelwerte)
+
+    def gemessen(self, *labelwerte):
+        # Dekorator: jede Ausführung der Funktion wird unter den Labelwerten beobachtet
+        def dekorator(fn):
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                with self.zeit(*labelwerte):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return dekorator
+
+    def zeilen(self):
+        with self._lock:
+            reihen = {k: (list(v[0]), v[1], v[2]) for k, v in self._reihen.items()}
+        zeilen = [f"# HELP {self.name} {self.hilfe}", f"# TYPE {self.name} histogram"]
+        for labelwerte, (zaehler, summe, anzahl) in sorted(reihen.items()):
+            kumuliert = 0
+            for grenze, n in zip(self.buckets + (float("inf"),), zaehler):
+                kumuliert += n
+                le = _labels(self.labels, labelwerte, [("le", _zahl(grenze))])
+                zeilen.append(f"{self.name}_bucket{le} {kumuliert}")
+            zeilen.append(f"{self.name}_sum{_labels(self.labels, labelwerte)} {_zahl(summe)}")
+            zeilen.append(f"{self.name}_count{_labels(self.labels, labelwerte)} {anzahl}")
+        return zeilen
+
+
+class Zaehler:
+    def __init__(self, name, hilfe, labels=()):
+        self.name = name
+        self.hilfe = hilfe
+        self.labels = tuple(labels)
+        self._werte = {}
+        self._lock = threading.Lock()
+
+    def erhoehe(self, *labelwerte, um=1):
+        with self._lock:
+            self._werte[labelwerte] = self._werte.get(labelwerte, 0) + um
+
+    def zeilen(self):
+        with self._lock:
+            werte = dict(self._werte)
+        zeilen = [f"# HELP {self.name} {self.hilfe}", f"# TYPE {self.name} counter"]
+        for labelwerte, wert in sorted(werte.items()):
+            zeilen.append(f"{self.name}{_labels(self.labels, labelwerte)} {_zahl(wert)}")
+        return zeilen
+
+
+class Abfrage:
+    # Wert wird erst beim Abruf von /metrics gelesen (Cache-Statistiken, Alter der Daten, ...).
+    # lesen() liefert eine Zahl oder {labelwerte-Tupel: zahl}; None-Werte werden ausgelassen.
+
+    def __init__(self, name, hilfe, lesen, labels=(), typ="gauge"):
+        self.name = name
+        self.hilfe = hilfe
+        self.lesen = lesen
+        self.labels = tuple(labels)
+        self.typ = typ
+
+    def zeilen(self):
+        werte = self.lesen()
+        if not isinstance(werte, dict):
+            werte = {(): werte}
+        zeilen = [f"# HELP {self.name} {self.hilfe}", f"# TYPE {self.name} {self.typ}"]
+        for labelwerte, wert in sorted(werte.items()):
+            if wert is not None:
+                zeilen.append(f"{self.name}{_labels(self.labels, labelwerte)} {_zahl(wert)}")
+        return zeilen
+
+
+class Register:
+    # Sammelt alle Metriken eines Prozesses und rendert sie im Prometheus-Textformat (Version 0.0.4)
+
+    CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+    def __init__(self):
+        self._metriken = []
+        self._lock = threading.Lock()
+
+    def _neu(self, metrik):
+        with self._lock:
+            self._metriken.append(metrik)
+        return metrik
+
+    def histogramm(self, name, hilfe, labels=(), buckets=SEKUNDEN_BUCKETS):
+        return self._neu(Histogramm(name, hilfe, labels, buckets))
+
+    def zaehler(self, name, hilfe, labels=()):
+        return self._neu(Zaehler(name, hilfe, labels))
+
+    def abfrage(self, name, hilfe, lesen, labels=(), typ="gauge"):
+        return self._neu(Abfrage(name, hilfe, lesen, labels, typ))
+
+    def text(self):
+        with self._lock:
+            metriken = list(self._metriken)
+        zeilen = []
+        for metrik in metriken:
+            zeilen += metrik.zeilen()
+        return "\n".join(zeilen) + "\n"
+
+
+# Prozessweites Register, wie das Default-Registry von prometheus_client
+METRIKEN = Register()
@@ -0,0 +1,57 @@
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+import numpy as np
+
+ZEITZONE = ZoneInfo("Europe/Berlin")
+MINUTEN_PRO_TAG = 24 * 60
+MINUTEN_PRO_WOCHE = 7 * MINUTEN_PRO_TAG
+
+# Wochentag-Wörter in Fragen (normalisiert) -> Index wie in standort_model.WOCHENTAGE
+TAGE_IN_FRAGE = {
+    "montag": 0, "dienstag": 1, "mittwoch": 2, "donnerstag": 3, "freitag": 4,
+    "samstag": 5, "sonnabend": 5, "sonntag": 6
+}
+
+
+def minute_der_woche(zeitpunkt: datetime) -> int:
+    # Naive Zeitpunkte gelten als deutsche Ortszeit
+    if zeitpunkt.tzinfo is None:
+        zeitpunkt = zeitpunkt.replace(tzinfo=ZEITZONE)
+    zeitpunkt = zeitpunkt.astimezone(ZEITZONE)
+    return zeitpunkt.weekday() * MINUTEN_PRO_TAG + zeitpunkt.hour * 60 + zeitpunkt.minute
+
+
+def jetzt() -> datetime:
+    return datetime.now(ZEITZONE)
+
+
+class OeffnungszeitenTabelle:
+    # Minuten-Bitmap pro Standort über die ganze Woche (Zeile = Standort, Spalte = Minute ab Montag 00:00).
+    # "Ist X offen?" ist ein Array-Zugriff, "welche sind offen?" eine Spalte der Matrix.
+
+    def __init__(self, standorte):
+        self.offen = np.zeros((len(standorte), MINUTEN_PRO_WOCHE), dtype=bool)
+        for i, s in enumerate(standorte):
+            for tag, von, bis in s.oeffnungszeiten():
+                start = tag * MINUTEN_PRO_TAG + von
+                ende = tag * MINUTEN_PRO_TAG + bis
+                if bis > von:
+                    self.offen[i, start:min(ende, MINUTEN_PRO_WOCHE)] = True
+                else:
+                    # über Mitternacht (bzw. Sonntag -> Montag)
+                    ende += MINUTEN_PRO_TAG
+                    self.offen[i, start:min(ende, MINUTEN_PRO_WOCHE)] = True
+                    if ende > MINUTEN_PRO_WOCHE:
+                        self.offen[i, :ende - MINUTEN_PRO_WOCHE] = True
+        # Pro Standort und Wochentag: überhaupt geöffnet?
+        self.tag_offen = self.offen.reshape(len(standorte), 7, MINUTEN_PRO_TAG).any(axis=2)
+
+    def ist_offen(self, i: int, zeitpunkt: datetime) -> bool:
+        return bool(self.offen[i, minute_der_woche(zeitpunkt)])
+
+    def offen_um(self, zeitpunkt: datetime):
+        return self.offen[:, minute_der_woche(zeitpunkt)]
+
+    def offen_am(self, tag: int):
+        return self.tag_offen[:, tag]
@@ -0,0 +1,114 @@
+from metriken import METRIKEN
+
+# Antwortfluss als Folge von Stufen in Prioritätsreihenfolge: die erste Stufe mit Antwort gewinnt, spätere Stufen
+# und ihre Matcher laufen nicht mehr. Jede Stufe hat ein billiges Tor; ist es zu, wird die Stufe übersprungen,
+# ohne dass ihre teuren Eingaben berechnet werden.
+#
+# Zwischenergebnisse (normalisierte Frage, Stichwort-Treffer, Standort-Kandidaten, FAQ-Treffer, ...) sind
+# @zwischenergebnis-Attribute einer Anfrage-Klasse: beim ersten Zugriff berechnet und danach von allen Stufen geteilt.
+
+# Deklarierte Kosten einer Stufe (grob, relativ): das Teuerste, was sie im schlimmsten Fall anstößt
+KOSTEN_STICHWORTE = 1  # Stichwort-Automat, Dict-Lookups
+KOSTEN_INDEX = 2  # vorberechnete Indizes (Jobs, Öffnungszeiten, Geo, BM25)
+KOSTEN_FUZZY = 3  # rapidfuzz über Standorte
+KOSTEN_ENCODER = 4  # model.encode
+
+PIPELINE_STUFEN = METRIKEN.zaehler(
+    "chatbot_pipeline_stufe_total", "Erreichte Pipeline-Stufen nach Ergebnis (tor, weiter, antwort)",
+    ("pipeline", "stufe", "ergebnis")
+)
+
+
+class zwischenergebnis:
+    # Wie functools.cached_property, aber ohne dessen klassenweiten Lock (bis Python 3.11), der gleichzeitige
+    # Anfragen gegeneinander serialisieren würde – z. B. während eine auf den Micro-Batcher wartet.
+    # Eine Anfrage wird immer nur von einem Thread bearbeitet.
+
+    def __init__(self, fn):
+        self.fn = fn
+        self.name = fn.__name__
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, obj, owner=None):
+        if obj is None:
+            return self
+        wert = obj.__dict__[self.name] = self.fn(obj)
+        return wert
+
+
+class Anfrage:
+    # Basis für Anfrage-Klassen mit @zwischenergebnis-Attributen
+
+    def __init__(self, frage):
+        self.frage = frage
+
+    def setze(self, name, wert):
+        # Zwischenergebnis vorab füllen (z. B. für einen ganzen Stapel auf einmal berechnet)
+        self.__dict__[name] = wert
+
+    def berechnet(self, name):
+        # True, wenn das Zwischenergebnis schon vorliegt
+        return name in self.__dict__
+
+
+class Stufe:
+    # antwort(anfrage) -> Antwort oder None (weiter zur nächsten Stufe).
+    # tor(anfrage) -> bool, darf nur billige Zwischenergebnisse lesen; None = immer offen.
+    # stapel(anfragen) füllt im Stapelbetrieb teure Zwischenergebnisse aller Anfragen mit offenem Tor auf einmal.
+
+    def __init__(self, name, kosten, antwort, tor=None, stapel=None):
+        self.name = name
+        self.kosten = kosten
+        self.antwort = antwort
+        self.tor = tor
+        self.stapel = stapel
+
+    def offen(self, anfrage):
+        return self.tor is None or self.tor(anfrage)
+
+
+class Pipeline:
+
+    def __init__(self, name, stufen):
+        self.name = name
+        self.stufen = list(stufen)
+
+    def beantworte(self, anfrage):
+        # (Stufe, Antwort) der ersten Stufe mit Antwort, sonst (None, None)
+        for stufe in self.stufen:
+            if not stufe.offen(anfrage):
+                PIPELINE_STUFEN.erhoehe(self.name, stufe.name, "tor")
+                continue
+            antwort = stufe.antwort(anfrage)
+            if antwort is not None:
+                PIPELINE_STUFEN.erhoehe(self.name, stufe.name, "antwort")
+                return stufe.name, antwort
+            PIPELINE_STUFEN.erhoehe(self.name, stufe.name, "weiter")
+        return None, None
+
+    def beantworte_alle(self, anfragen):
+        # Wie beantworte für einen Stapel, aber Stufe für Stufe über alle noch offenen Anfragen,
+        # damit stapel() die teuren Eingaben einer Stufe gebündelt berechnen kann
+        ergebnisse = [(None, None)] * len(anfragen)
+        offen = list(range(len(anfragen)))
+        for stufe in self.stufen:
+            if not offen:
+                break
+            bereit = [i for i in offen if stufe.offen(anfragen[i])]
+            PIPELINE_STUFEN.erhoehe(self.name, stufe.name, "tor", um=len(offen) - len(bereit))
+            if bereit and stufe.stapel is not None:
+                stufe.stapel([anfragen[i] for i in bereit])
+            for i in bereit:
+                antwort = stufe.antwort(anfragen[i])
+                if antwort is not None:
+                    ergebnisse[i] = (stufe.name, antwort)
+            beantwortet = {i for i in bereit if ergebnisse[i][1] is not None}
+            PIPELINE_STUFEN.erhoehe(self.name, stufe.name, "antwort", um=len(beantwortet))
+            PIPELINE_STUFEN.erhoehe(self.name, stufe.name, "weiter", um=len(bereit) - len(beantwortet))
+            offen = [i for i in offen if i not in beantwortet]
+        return ergebnisse
+
+    def stats(self):
+        return [{"stufe": s.name, "kosten": s.kosten} for s in self.stufen]
@@ -0,0 +1,57 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from textnorm import normalisiere_frage
+
+QUERY_CACHE_SIZE = int(os.getenv("QUERY_CACHE_SIZE", "2048"))
+QUERY_CACHE_TTL = float(os.getenv("QUERY_CACHE_TTL", "3600"))
+
+
+class QueryEmbeddingCache:
+    # LRU-Cache für Frage-Embeddings, Schlüssel ist die normalisierte Frage
+
+    def __init__(self, encode, max_size=QUERY_CACHE_SIZE, ttl=QUERY_CACHE_TTL):
+        self._encode = encode
+        self.max_size = max_size
+        self.ttl = ttl
+        self._eintraege = OrderedDict()  # Schlüssel -> (Zeitstempel, Embedding)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def encode(self, frage):
+        key = normalisiere_frage(frage)
+        jetzt = time.monotonic()
+        with self._lock:
+            eintrag = self._eintraege.get(key)
+            if eintrag is not None and jetzt - eintrag[0] < self.ttl:
+                self._eintraege.move_to_end(key)
+                self.hits += 1
+                return eintrag[1]
+            self.misses += 1
+
+        embedding = self._encode(frage)
+
+        with self._lock:
+            self._eintraege[key] = (jetzt, embedding)
+            self._eintraege.move_to_end(key)
+            while len(self._eintraege) > self.max_size:
+                self._eintraege.popitem(last=False)
+        return embedding
+
+    def leeren(self):
+        with self._lock:
+            self._eintraege.clear()
+
+    def stats(self):
+        with self._lock:
+            anfragen = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / anfragen, 3) if anfragen else 0.0,
+                "size": len(self._eintraege),
+                "max_size": self.max_size,
+            }
@@ -0,0 +1,159 @@
+import logging
+import re
+import sys
+from array import array
+from dataclasses import dataclass, field
+
+from feed_parser import iter_elemente
+
+logger = logging.getLogger("chatbot")
+
+WOCHENTAGE = ("Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday")
+WOCHENTAGE_DEUTSCH = {
+    "Monday": "Montag",
+    "Tuesday": "Dienstag",
+    "Wednesday": "Mittwoch",
+    "Thursday": "Donnerstag",
+    "Friday": "Freitag",
+    "Saturday": "Samstag",
+    "Sunday": "Sonntag"
+}
+
+
+def _minuten(uhrzeit: str) -> int:
+    stunden, minuten = uhrzeit.strip().split(":")[:2]
+    return int(stunden) * 60 + int(minuten)
+
+
+def _uhrzeit(minuten: int) -> str:
+    return f"{minuten // 60:02d}:{minuten % 60:02d}"
+
+
+def _intern(text) -> str:
+    return sys.intern((text or "").strip())
+
+
+@dataclass(slots=True)
+class Standort:
+    store_code: str
+    title: str
+    stadt: str  # wie im Feed, z. B. "Menden (Sauerland)"
+    stadt_bereinigt: str  # ohne Klammerzusatz, z. B. "Menden"
+    strasse: str
+    postleitzahl: str
+    telefon: str
+    standort_url: str
+    primary_category: str  # kleingeschrieben
+    opening_status: str = ""
+    region_code: str = ""
+    language_code: str = ""
+    description: str = ""
+    latitude: float = None
+    longitude: float = None
+    # Öffnungszeiten gepackt als Tripel (Wochentag 0–6, von, bis) in Minuten seit Mitternacht
+    zeiten_packed: array = field(default_factory=lambda: array("H"))
+    slugteile: tuple = ()
+    aliases: tuple = ()
+
+    @property
+    def title_lower(self):
+        return self.title.lower()
+
+    @property
+    def adresse(self):
+        return f"{self.strasse} {self.postleitzahl}".strip()
+
+    @property
+    def maps(self):
+        return f"https://www.google.com/maps/search/?api=1&query={self.adresse.replace(' ', '+')},{self.stadt_bereinigt.replace(' ', '+')}"
+
+    def oeffnungszeiten(self):
+        # (Wochentag-Index, von, bis) in Minuten
+        z = self.zeiten_packed
+        for i in range(0, len(z), 3):
+            yield z[i], z[i + 1], z[i + 2]
+
+    @property
+    def zeiten_raw(self):
+        return [
+            {"tag": WOCHENTAGE[tag], "von": _uhrzeit(von), "bis": _uhrzeit(bis)}
+            for tag, von, bis in self.oeffnungszeiten()
+        ]
+
+    def zeiten_text(self, deutsch=False):
+        teile = []
+        for tag, von, bis in self.oeffnungszeiten():
+            name = WOCHENTAGE_DEUTSCH[WOCHENTAGE[tag]] if deutsch else WOCHENTAGE[tag]
+            teile.append(f"{name}: {_uhrzeit(von)}–{_uhrzeit(bis)}")
+        return " | ".join(teile) if teile else "Nicht verfügbar"
+
+    @property
+    def zeiten(self):
+        return self.zeiten_text()
+
+
+def parse_standort(s) -> Standort:
+    stadt_roh = s.findtext("stadt", "")
+    stadt = re.sub(r"\s*\(.*?\)", "", stadt_roh).strip()
+    title = s.findtext("title", "").strip()
+    url = s.findtext("standort_url", "").strip()
+
+    # Öffnungszeiten vollständig extrahieren
+    zeiten = array("H")
+    for h in s.findall(".//openingHoursSpecification/hours"):
+        tag = h.findtext("dayOfWeek", "").strip()
+        von = h.findtext("opens", "")
+        bis = h.findtext("closes", "")
+        if tag and von and bis:
+            try:
+                zeiten.extend((WOCHENTAGE.index(tag), _minuten(von), _minuten(bis)))
+            except ValueError:
+                logger.warning(f"Unbekannte Öffnungszeit bei {title}: {tag} {von}–{bis}")
+
+    # Slugteile aus URL
+    slugteile = []
+    if url:
+        slug_raw = url.rstrip("/").split("/")[-1]
+        slugteile = slug_raw.replace("-", " ").split()
+
+    # Aliases auf Basis von Stadt, Titel, Slug (leere Strings gefiltert)
+    aliases = {
+        a.strip() for a in [
+            stadt.lower(),
+            stadt.lower().replace("-", " "),
+            title.lower(),
+            title.lower().replace("-", " ")
+        ] + slugteile if a.strip()
+    }
+
+    def koordinate(pfad):
+        try:
+            return float(s.findtext(pfad, ""))
+        except ValueError:
+            return None
+
+    return Standort(
+        store_code=_intern(s.findtext("store_code", "")),
+        title=_intern(title),
+        stadt=_intern(stadt_roh),
+        stadt_bereinigt=_intern(stadt),
+        strasse=s.findtext("strasse", ""),
+        postleitzahl=_intern(s.findtext("postleitzahl", "")),
+        telefon=s.findtext("telefon", ""),
+        standort_url=url,
+        primary_category=_intern(s.findtext("primary_category", "").lower()),
+        opening_status=_intern(s.findtext("opening_status", "")),
+        region_code=_intern(s.findtext("region_code", "")),
+        language_code=_intern(s.findtext("language_code", "")),
+        description=s.findtext("description", ""),
+        latitude=koordinate("geo/latitude"),
+        longitude=koordinate("geo/longitude"),
+        zeiten_packed=zeiten,
+        slugteile=tuple(_intern(t) for t in slugteile),
+        aliases=tuple(sorted(_intern(a) for a in aliases))
+    )
+
+
+def parse_standorte(quelle):
+    # Streaming: jeder <standort> wird nach der Verarbeitung wieder freigegeben
+    return [parse_standort(s) for s in iter_elemente(quelle, {"standort"})]
@@ -0,0 +1,21 @@
+import re
+
+
+# --- Hilfsfunktion: Normalisierung (für Umlaute etc.) ---
+def normalisiere(text):
+    return text.lower().replace("ä", "ae").replace("ö", "oe").replace("ü", "ue").replace("ß", "ss")
+
+
+def normalisiere_frage(text):
+    # Schlüssel für Caches: Umlaute gefaltet, Leerraum zusammengefasst
+    return " ".join(normalisiere(text).split())
+
+
+def frage_schluessel(text):
+    # Schlüssel für den Antwort-Cache: nur Groß-/Kleinschreibung und Leerraum vereinheitlicht.
+    # Umlaute bleiben, weil die Stichwortlisten "öffnungszeiten" und "oeffnungszeiten" unterscheiden.
+    return " ".join(text.lower().split())
+
+
+def tokenisiere(text):
+    return re.findall(r"\w+", normalisiere(text))
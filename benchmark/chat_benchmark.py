@@ -0,0 +1,489 @@
+# Latenz- und Durchsatz-Benchmark für backend/chat_backend.py
+#
+# Treibt die Chat-Pipeline in-process (beantworte_frage) und über HTTP (/chat) mit einem festen Fragenkorpus:
+# README-Deep-Links, alle FAQ-Fragen samt Umformulierungen, alle Zentrumstitel mit Tippfehlern
+# sowie Jobfragen nach Ort und Beruf. Läuft offline: Stub-Encoder statt SentenceTransformer,
+# Feeds aus lokalen Dateien über einen lokalen HTTP-Server.
+#
+#   python benchmark/chat_benchmark.py --ausgabe ergebnis.json
+#   python benchmark/chat_benchmark.py --modus http --parallel 1,8,32
+#   python benchmark/chat_benchmark.py --modus http --url https://mein-backend.example --encoder echt
+
+import argparse
+import functools
+import hashlib
+import json
+import logging
+import os
+import platform
+import random
+import re
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import types
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote
+
+import numpy as np
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BACKEND_DIR = os.path.join(REPO_DIR, "backend")
+
+STUB_DIM = 384  # wie all-MiniLM-L6-v2
+
+# Berufe für die synthetische Job-Sitemap (Slug-Präfix wie auf novotergum.de)
+SITEMAP_BERUFE = [
+    "physiotherapeut-m-w-d", "ergotherapeut-m-w-d", "logopaede-m-w-d", "rezeption-empfang-m-w-d",
+    "fachliche-leitung-physiotherapie-m-w-d", "sporttherapeut-m-w-d", "kinderphysiotherapeut-m-w-d",
+    "arzt-orthopaedie-m-w-d",
+]
+
+
+# --- Stub-Encoder ---
+
+def installiere_stub_encoder(latenz_ms=0.0):
+    # Ersetzt sentence_transformers durch einen deterministischen Hash-Encoder (Wörter + Zeichen-Trigramme).
+    # latenz_ms simuliert die Rechenzeit eines Forward-Passes pro encode-Aufruf.
+    def vektor(text):
+        v = np.zeros(STUB_DIM, dtype=np.float32)
+        text = text.lower()
+        merkmale = text.split() + [text[i:i + 3] for i in range(len(text) - 2)]
+        for m in merkmale:
+            v[int(hashlib.md5(m.encode("utf-8")).hexdigest(), 16) % STUB_DIM] += 1
+        return v
+
+    class SentenceTransformer:
+        def __init__(self, name, **kwargs):
+            self.name = name
+
+        def get_sentence_embedding_dimension(self):
+            return STUB_DIM
+
+        def encode(self, texte, convert_to_tensor=False, normalize_embeddings=False, **kwargs):
+            if latenz_ms:
+                time.sleep(latenz_ms / 1000)
+            einzeln = isinstance(texte, str)
+            matrix = np.stack([vektor(t) for t in ([texte] if einzeln else texte)]) if texte else np.zeros((0, STUB_DIM), np.float32)
+            if normalize_embeddings:
+                matrix /= np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-9)
+            return matrix[0] if einzeln else matrix
+
+    def cos_sim(a, b):
+        a = np.atleast_2d(np.asarray(a, dtype=np.float32))
+        b = np.atleast_2d(np.asarray(b, dtype=np.float32))
+        a = a / np.maximum(np.linalg.norm(a, axis=1, keepdims=True), 1e-9)
+        b = b / np.maximum(np.linalg.norm(b, axis=1, keepdims=True), 1e-9)
+        return a @ b.T
+
+    modul = types.ModuleType("sentence_transformers")
+    modul.SentenceTransformer = SentenceTransformer
+    modul.util = types.SimpleNamespace(cos_sim=cos_sim)
+    sys.modules["sentence_transformers"] = modul
+
+
+# --- Lokale Feeds ---
+
+def schreibe_job_sitemap(standorte, pfad):
+    # Synthetische Sitemap: jeder Beruf in jeder Stadt des Standort-Feeds
+    from textnorm import tokenisiere
+    staedte = sorted({"-".join(tokenisiere(s.stadt_bereinigt)) for s in standorte} - {""})
+    urls = [
+        f"https://novotergum.de/jobs/{beruf}-{stadt}/"
+        for stadt in staedte for beruf in SITEMAP_BERUFE
+    ]
+    with open(pfad, "w", encoding="utf-8") as f:
+        f.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+        f.write('<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n')
+        for url in urls:
+            f.write(f"<url><loc>{url}</loc></url>\n")
+        f.write("</urlset>\n")
+
+
+def starte_feed_server(verzeichnis):
+    handler = functools.partial(_StillerHandler, directory=verzeichnis)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+class _StillerHandler(SimpleHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+# --- Korpus ---
+
+def tippfehler(text, rng):
+    # Ein Tippfehler an zufälliger Buchstabenposition: vertauschen, auslassen oder verdoppeln
+    positionen = [i for i, ch in enumerate(text[:-1]) if ch.isalpha() and text[i + 1].isalpha()]
+    if not positionen:
+        return text
+    i = rng.choice(positionen)
+    art = rng.choice(("tausch", "weg", "doppelt"))
+    if art == "tausch":
+        return text[:i] + text[i + 1] + text[i] + text[i + 2:]
+    if art == "weg":
+        return text[:i] + text[i + 1:]
+    return text[:i] + text[i] + text[i:]
+
+
+def readme_fragen():
+    with open(os.path.join(REPO_DIR, "README.md"), encoding="utf-8") as f:
+        return [unquote(m) for m in re.findall(r"\?frage=([^)\s]+)", f.read())]
+
+
+def baue_korpus(cb, seed=42, max_orte=20):
+    # Fester Korpus: gleiche Feeds, gleiche FAQ und gleicher Seed ergeben dieselben Fragen in derselben Reihenfolge
+    rng = random.Random(seed)
+    korpus = []
+
+    def dazu(kategorie, frage):
+        korpus.append({"kategorie": kategorie, "frage": frage})
+
+    for frage in readme_fragen():
+        dazu("readme", frage)
+
+    for frage, _ in cb.engine.faq_data:
+        dazu("faq", frage)
+        ohne_zeichen = frage.rstrip("?!. ").lower()
+        dazu("faq_umformuliert", ohne_zeichen)
+        dazu("faq_umformuliert", f"Sag mal, {ohne_zeichen}?")
+        dazu("faq_umformuliert", tippfehler(frage, rng))
+
+    for s in cb.standort_daten.standorte:
+        dazu("standort", tippfehler(s.title, rng))
+        dazu("standort", f"Adresse {tippfehler(s.title, rng)}")
+
+    orte = sorted(cb.job_daten.nach_ort)[:max_orte]
+    for ort in orte:
+        dazu("job", f"Stellen in {ort.capitalize()}")
+        for beruf in cb.berufsfilter:
+            dazu("job", f"Jobs {beruf} in {ort.capitalize()}")
+
+    # Doppelte raus (erste Kategorie gewinnt), sonst misst ein Durchlauf teils den Antwort-Cache
+    gesehen = set()
+    return [e for e in korpus if not (e["frage"] in gesehen or gesehen.add(e["frage"]))]
+
+
+# --- Messung ---
+
+def perzentile(werte_ms):
+    if not werte_ms:
+        return {}
+    a = np.asarray(werte_ms)
+    return {
+        "p50": round(float(np.percentile(a, 50)), 3),
+        "p95": round(float(np.percentile(a, 95)), 3),
+        "p99": round(float(np.percentile(a, 99)), 3),
+        "mittel": round(float(a.mean()), 3),
+        "max": round(float(a.max()), 3),
+        "anzahl": int(a.size),
+    }
+
+
+class StufenUhr:
+    # Misst die Zeit in einzelnen Pipeline-Funktionen, indem sie im chat_backend-Modul ummantelt werden
+
+    STUFEN = {
+        "intent": "analysiere_frage",
+        "standort": "finde_standort_id",
+        "jobs": "finde_jobs_fuer_ort",
+    }
+
+    def __init__(self, cb):
+        self.cb = cb
+        self.summen = {}
+        self.aufrufe = {}
+        self._lock = threading.Lock()
+        self.aktiv = False
+
+    def _messe(self, stufe, fn):
+        @functools.wraps(fn)
+        def gemessen(*args, **kwargs):
+            if not self.aktiv:
+                return fn(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                dauer = time.perf_counter() - start
+                with self._lock:
+                    self.summen[stufe] = self.summen.get(stufe, 0.0) + dauer
+                    self.aufrufe[stufe] = self.aufrufe.get(stufe, 0) + 1
+        return gemessen
+
+    def installiere(self):
+        cb = self.cb
+        for stufe, name in self.STUFEN.items():
+            setattr(cb, name, self._messe(stufe, getattr(cb, name)))
+        # Encoder über den Frage-Cache; BM25 und Ähnlichkeit an den Index-Klassen, damit auch ein nach
+        # FAQ-Änderungen neu aufgebauter Index gemessen wird
+        from faq_bm25 import FaqBm25Index
+        from faq_index import FaqVektorIndex
+        cb.frage_cache.encode = self._messe("encode", cb.frage_cache.encode)
+        FaqBm25Index.bewerte = self._messe("bm25", FaqBm25Index.bewerte)
+        FaqVektorIndex.scores = self._messe("aehnlichkeit", FaqVektorIndex.scores)
+
+    def bericht(self, gesamt_s):
+        ergebnis = {}
+        for stufe in list(self.STUFEN) + ["encode", "bm25", "aehnlichkeit"]:
+            summe = self.summen.get(stufe, 0.0)
+            aufrufe = self.aufrufe.get(stufe, 0)
+            ergebnis[stufe] = {
+                "gesamt_ms": round(summe * 1000, 3),
+                "aufrufe": aufrufe,
+                "mittel_ms": round(summe * 1000 / aufrufe, 4) if aufrufe else 0.0,
+                "anteil": round(summe / gesamt_s, 4) if gesamt_s else 0.0,
+            }
+        rest = gesamt_s - sum(self.summen.values())
+        ergebnis["rest"] = {"gesamt_ms": round(rest * 1000, 3), "anteil": round(rest / gesamt_s, 4) if gesamt_s else 0.0}
+        return ergebnis
+
+
+def leere_caches(cb):
+    if cb is not None:
+        cb.frage_cache.leeren()
+        cb.antwort_cache.leeren()
+
+
+def durchlauf(anfrage, korpus, parallel):
+    # Alle Fragen mit `parallel` Threads; liefert (Gesamtdauer, Latenzen je Frage in ms)
+    latenzen = [0.0] * len(korpus)
+
+    def eine(i):
+        start = time.perf_counter()
+        anfrage(korpus[i]["frage"])
+        latenzen[i] = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    if parallel == 1:
+        for i in range(len(korpus)):
+            eine(i)
+    else:
+        with ThreadPoolExecutor(max_workers=parallel) as pool:
+            list(pool.map(eine, range(len(korpus))))
+    return time.perf_counter() - start, latenzen
+
+
+def messe(anfrage, korpus, args, cb, uhr=None):
+    kategorien = sorted({e["kategorie"] for e in korpus})
+
+    # Aufwärmen (Imports, erste numpy-/rapidfuzz-Aufrufe), nicht gewertet
+    for e in korpus[:10]:
+        anfrage(e["frage"])
+
+    alle, nach_kategorie, gesamt_s = [], {k: [] for k in kategorien}, 0.0
+    if uhr:
+        uhr.aktiv = True
+    for _ in range(args.wiederholungen):
+        if not args.warm:
+            leere_caches(cb)
+        dauer, latenzen = durchlauf(anfrage, korpus, 1)
+        gesamt_s += dauer
+        alle += latenzen
+        for e, ms in zip(korpus, latenzen):
+            nach_kategorie[e["kategorie"]].append(ms)
+    if uhr:
+        uhr.aktiv = False
+
+    durchsatz = []
+    for parallel in args.parallel:
+        if not args.warm:
+            leere_caches(cb)
+        dauer, latenzen = durchlauf(anfrage, korpus, parallel)
+        durchsatz.append({
+            "parallel": parallel,
+            "anfragen": len(korpus),
+            "dauer_s": round(dauer, 3),
+            "qps": round(len(korpus) / dauer, 1) if dauer else None,
+            "latenz_ms": perzentile(latenzen),
+        })
+        print(f"  parallel={parallel:<3} {durchsatz[-1]['qps']} Anfragen/s", file=sys.stderr)
+
+    ergebnis = {
+        "latenz_ms": perzentile(alle),
+        "latenz_nach_kategorie_ms": {k: perzentile(v) for k, v in nach_kategorie.items()},
+        "durchsatz": durchsatz,
+    }
+    if uhr:
+        ergebnis["stufen"] = uhr.bericht(gesamt_s)
+    return ergebnis
+
+
+# --- HTTP ---
+
+def freier_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def starte_backend_server(cb):
+    import uvicorn
+    port = freier_port()
+    server = uvicorn.Server(uvicorn.Config(cb.app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        if not thread.is_alive():
+            raise RuntimeError("uvicorn konnte nicht starten")
+        time.sleep(0.05)
+    return server, f"http://127.0.0.1:{port}"
+
+
+def http_anfrage(basis_url, timeout):
+    import requests
+    lokal = threading.local()
+
+    def anfrage(frage):
+        # Eine Session je Thread, damit Keep-Alive wie bei einem echten Client greift
+        session = getattr(lokal, "session", None)
+        if session is None:
+            session = lokal.session = requests.Session()
+        r = session.get(f"{basis_url}/chat", params={"frage": frage}, timeout=timeout)
+        if r.status_code != 200:
+            raise RuntimeError(f"/chat antwortete mit {r.status_code}: {r.text[:200]}")
+        return r.json()
+
+    return anfrage
+
+
+# --- Ablauf ---
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def lade_backend(args, feed_url):
+    # chat_backend liest faq/ relativ zum Arbeitsverzeichnis; das Modell wird hier vorab geladen,
+    # damit nicht der lexikalische FAQ-Fallback der Startphase gemessen wird
+    if args.encoder == "stub":
+        installiere_stub_encoder(args.stub_latenz_ms)
+    os.chdir(BACKEND_DIR)
+    sys.path.insert(0, BACKEND_DIR)
+    import chat_backend as cb
+
+    # "Kein Standort-Match" pro Frage würde die Messung mit Terminal-Ausgabe verfälschen
+    logging.getLogger("chatbot").setLevel(logging.ERROR)
+    cb.standort_refresher.url = f"{feed_url}/standorte.xml"
+    cb.job_refresher.url = f"{feed_url}/jobs.xml"
+    cb.standort_refresher.fetch_once()
+    cb.job_refresher.fetch_once()
+    if not cb.engine.lade_modell():
+        raise SystemExit(f"Modell konnte nicht geladen werden: {cb.engine.modell_fehler}")
+    return cb
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latenz- und Durchsatz-Benchmark für die Chat-Pipeline")
+    parser.add_argument("--modus", choices=("inprocess", "http", "beide"), default="beide")
+    parser.add_argument("--url", help="Bestehendes Backend über HTTP messen statt eines lokalen Servers")
+    parser.add_argument("--encoder", choices=("stub", "echt"), default="stub")
+    parser.add_argument("--stub-latenz-ms", type=float, default=0.0, help="Simulierte Encoder-Zeit pro Aufruf")
+    parser.add_argument("--standorte", default=os.path.join(REPO_DIR, "standorte-test.xml"), help="Lokale Kopie des Standort-Feeds")
+    parser.add_argument("--jobs", help="Lokale Kopie der Job-Sitemap (sonst synthetisch aus den Standorten)")
+    parser.add_argument("--parallel", default="1,4,16", help="Parallelitätsstufen für den Durchsatz, kommagetrennt")
+    parser.add_argument("--wiederholungen", type=int, default=3, help="Durchläufe für die Latenz-Perzentile")
+    parser.add_argument("--warm", action="store_true", help="Caches zwischen den Durchläufen nicht leeren")
+    parser.add_argument("--max-orte", type=int, default=20, help="Orte für Jobfragen (je Ort alle Berufe)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--timeout", type=float, default=30.0, help="HTTP-Timeout pro Anfrage")
+    parser.add_argument("--korpus", help="Korpus zusätzlich als JSON speichern")
+    parser.add_argument("--ausgabe", help="Ergebnis als JSON speichern (sonst stdout)")
+    args = parser.parse_args()
+    args.parallel = [int(p) for p in args.parallel.split(",") if p.strip()]
+    # Pfade vor dem Wechsel nach backend/ auflösen
+    for name in ("standorte", "jobs", "korpus", "ausgabe"):
+        if getattr(args, name):
+            setattr(args, name, os.path.abspath(getattr(args, name)))
+
+    # Ohne Netz und ohne Nebenwirkungen: FAQ-Embeddings und geteilte Index-Matrizen in ein Temp-Verzeichnis
+    # (nicht backend/.cache, dessen Aufräumen sonst Dateien eines laufenden Servers löschen könnte),
+    # kein geteilter Antwort-Cache
+    tmp = tempfile.mkdtemp(prefix="chat-benchmark-")
+    os.environ["FAQ_CACHE_DIR"] = os.path.join(tmp, "faq_embeddings")
+    os.environ["FAQ_INDEX_DIR"] = os.path.join(tmp, "faq_index")
+    os.environ.pop("ANTWORT_CACHE_DB", None)
+
+    feeds = os.path.join(tmp, "feeds")
+    os.makedirs(feeds)
+    with open(args.standorte, "rb") as quelle, open(os.path.join(feeds, "standorte.xml"), "wb") as ziel:
+        ziel.write(quelle.read())
+    if args.jobs:
+        with open(args.jobs, "rb") as quelle, open(os.path.join(feeds, "jobs.xml"), "wb") as ziel:
+            ziel.write(quelle.read())
+    else:
+        sys.path.insert(0, BACKEND_DIR)
+        from standort_model import parse_standorte
+        with open(args.standorte, "rb") as f:
+            schreibe_job_sitemap(parse_standorte(f), os.path.join(feeds, "jobs.xml"))
+    feed_server, feed_url = starte_feed_server(feeds)
+
+    cb = lade_backend(args, feed_url)
+    korpus = baue_korpus(cb, seed=args.seed, max_orte=args.max_orte)
+    if args.korpus:
+        with open(args.korpus, "w", encoding="utf-8") as f:
+            json.dump(korpus, f, ensure_ascii=False, indent=2)
+
+    ergebnis = {
+        "meta": {
+            "zeit": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "plattform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "encoder": args.encoder,
+            "stub_latenz_ms": args.stub_latenz_ms if args.encoder == "stub" else None,
+            "wiederholungen": args.wiederholungen,
+            "warm": args.warm,
+            "seed": args.seed,
+            "korpus": {k: sum(1 for e in korpus if e["kategorie"] == k) for k in sorted({e["kategorie"] for e in korpus})},
+            "standorte": len(cb.standort_daten.standorte),
+            "jobs": len(cb.job_daten.jobs),
+            "faq": len(cb.engine.faq_data),
+        }
+    }
+
+    if args.modus in ("inprocess", "beide"):
+        print(f"In-process: {len(korpus)} Fragen", file=sys.stderr)
+        uhr = StufenUhr(cb)
+        uhr.installiere()
+        ergebnis["inprocess"] = messe(cb.beantworte_frage, korpus, args, cb, uhr)
+
+    if args.modus in ("http", "beide"):
+        backend_server = None
+        if args.url:
+            basis_url = args.url.rstrip("/")
+        else:
+            backend_server, basis_url = starte_backend_server(cb)
+        print(f"HTTP ({basis_url}): {len(korpus)} Fragen", file=sys.stderr)
+        # Ein entferntes Backend lässt sich nicht leeren; dort misst jeder Durchlauf nach dem ersten warm
+        ergebnis["http"] = messe(http_anfrage(basis_url, args.timeout), korpus, args, None if args.url else cb)
+        ergebnis["http"]["url"] = args.url
+        if backend_server:
+            backend_server.should_exit = True
+
+    cb.stoppe_refresher()
+    feed_server.shutdown()
+
+    text = json.dumps(ergebnis, ensure_ascii=False, indent=2)
+    if args.ausgabe:
+        with open(args.ausgabe, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
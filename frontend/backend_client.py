@@ -0,0 +1,54 @@
+import os
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# HTTP-Client der Oberfläche zum Backend: eine Session pro Prozess mit Verbindungspool (Keep-Alive statt neuem
+# TCP-/TLS-Handshake pro Frage) und Connect-/Read-Timeouts.
+
+BACKEND_CONNECT_TIMEOUT = float(os.getenv("BACKEND_CONNECT_TIMEOUT", "3.05"))
+BACKEND_READ_TIMEOUT = float(os.getenv("BACKEND_READ_TIMEOUT", "10"))
+BACKEND_RETRIES = int(os.getenv("BACKEND_RETRIES", "2"))
+BACKEND_POOL_SIZE = int(os.getenv("BACKEND_POOL_SIZE", "10"))
+
+# Wiederholt werden nur Verbindungsfehler und Gateway-Fehler des Proxys. 503 ist die Lastabwehr des Backends
+# (volle Warteschlange): ein Retry würde die Last nur verstärken, die Oberfläche meldet ihn direkt.
+RETRY_STATUS = (502, 504)
+
+
+def neue_session():
+    retry = Retry(
+        total=BACKEND_RETRIES,
+        connect=BACKEND_RETRIES,
+        read=0,  # /chat hat die Frage evtl. schon bearbeitet; nach Read-Timeout nicht noch einmal schicken
+        status=BACKEND_RETRIES,
+        backoff_factor=0.3,
+        status_forcelist=RETRY_STATUS,
+        allowed_methods=frozenset({"GET"}),
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=BACKEND_POOL_SIZE, pool_maxsize=BACKEND_POOL_SIZE, max_retries=retry)
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def hole_session() -> requests.Session:
+    # Streamlit führt das Skript bei jeder Eingabe neu aus, importierte Module bleiben: die Session überlebt
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = neue_session()
+    return _session
+
+
+def get(url, **kwargs) -> requests.Response:
+    return hole_session().get(url, timeout=(BACKEND_CONNECT_TIMEOUT, BACKEND_READ_TIMEOUT), **kwargs)
@@ -1,5 +1,7 @@
 import streamlit as st
-import requests
+
+# Gepoolte Session zum Backend (Keep-Alive, Timeouts); 503 = Backend ausgelastet, wird nicht wiederholt
+import backend_client
 
 # Backend-URL eintragen (z. B. von Railway)
 BACKEND_URL = "https://novotergum-chatbot-production.up.railway.app"
@@ -13,7 +15,10 @@ frage = st.text_input("Deine Frage:")
 if frage:
     try:
         with st.spinner("Denke nach..."):
-            r = requests.get(f"{BACKEND_URL}/chat", params={"frage": frage})
+            r = backend_client.get(f"{BACKEND_URL}/chat", params={"frage": frage})
+            if r.status_code == 503:
+                st.warning("Der Chatbot ist gerade ausgelastet. Bitte versuche es in ein paar Sekunden noch einmal.")
+                st.stop()
             r.raise_for_status()
             daten = r.json()
 
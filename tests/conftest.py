@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Die Backend-Module importieren sich gegenseitig ohne Paketpräfix (Arbeitsverzeichnis backend/)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend"))
@@ -0,0 +1,55 @@
+import asyncio
+
+from antwort_cache import AntwortCache
+
+
+def worker(pfad):
+    # Wie ein uvicorn-Worker: eigener Prozess-Cache, gemeinsame SQLite-Datei
+    cache = AntwortCache(pfad=str(pfad))
+    cache._geteilt.aufraeumen = 1
+    return cache
+
+
+def test_geteilter_treffer_ueber_worker(tmp_path):
+    a, b = worker(tmp_path / "antworten.db"), worker(tmp_path / "antworten.db")
+    for cache in (a, b):
+        cache.setze_generation("standorte", "v1")
+    asyncio.run(a.speichere_async("wo ist bochum", {"typ": "standort"}, a.generation))
+    assert asyncio.run(b.hole_async("wo ist bochum")) == {"typ": "standort"}
+    assert b.stats()["geteilte_hits"] == 1
+    # Jetzt im Prozess-Cache von b
+    assert asyncio.run(b.hole_async("wo ist bochum")) == {"typ": "standort"}
+    assert b.stats()["hits"] == 1
+
+
+def test_worker_auf_anderer_generation_loeschen_sich_nicht_gegenseitig(tmp_path):
+    a, b = worker(tmp_path / "antworten.db"), worker(tmp_path / "antworten.db")
+    a.setze_generation("standorte", "v1")
+    b.setze_generation("standorte", "v1")
+    a.speichere("alt", {"typ": "faq"}, a.generation)
+    # b hat den Feed schon neu geladen, a noch nicht
+    b.setze_generation("standorte", "v2")
+    b.speichere("neu", {"typ": "faq"}, b.generation)
+    a.speichere("noch alt", {"typ": "faq"}, a.generation)
+    a._eintraege.clear()
+    assert a.hole("noch alt") == {"typ": "faq"}
+    b._eintraege.clear()
+    assert b.hole("neu") == {"typ": "faq"}
+
+
+def test_abgeloeste_generation_wird_aufgeraeumt(tmp_path):
+    cache = worker(tmp_path / "antworten.db")
+    cache.setze_generation("faq", "v1")
+    cache.speichere("frage", {"typ": "faq"}, cache.generation)
+    cache.setze_generation("faq", "v2")
+    cache.speichere("andere", {"typ": "faq"}, cache.generation)
+    zeilen = cache._geteilt._db.execute("SELECT schluessel FROM antworten").fetchall()
+    assert zeilen == [("andere",)]
+
+
+def test_ohne_geteilte_ebene(tmp_path):
+    cache = AntwortCache()
+    assert asyncio.run(cache.hole_async("x")) is None
+    asyncio.run(cache.speichere_async("x", {"typ": "faq"}, cache.generation))
+    assert asyncio.run(cache.hole_async("x")) == {"typ": "faq"}
+    assert cache.stats()["misses"] == 1
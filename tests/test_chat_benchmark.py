@@ -0,0 +1,24 @@
+import json
+import os
+import subprocess
+import sys
+
+BENCHMARK = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmark", "chat_benchmark.py")
+
+
+def test_benchmark_laeuft_offline(tmp_path):
+    # Kleinster Durchlauf mit Stub-Encoder und lokalen Feeds: Korpus, Messung und JSON-Ausgabe funktionieren
+    ausgabe = tmp_path / "ergebnis.json"
+    subprocess.run(
+        [sys.executable, BENCHMARK, "--modus", "inprocess", "--wiederholungen", "1", "--max-orte", "2",
+         "--parallel", "2", "--ausgabe", str(ausgabe)],
+        check=True, capture_output=True, timeout=120,
+    )
+    ergebnis = json.loads(ausgabe.read_text(encoding="utf-8"))
+    assert ergebnis["meta"]["encoder"] == "stub"
+    assert ergebnis["meta"]["standorte"] > 0 and ergebnis["meta"]["faq"] > 0
+    inprocess = ergebnis["inprocess"]
+    assert {"faq", "standort", "job"} <= set(inprocess["latenz_nach_kategorie_ms"])
+    assert [d["parallel"] for d in inprocess["durchsatz"]] == [2]
+    assert inprocess["durchsatz"][0]["anfragen"] == inprocess["latenz_ms"]["anzahl"]
+    assert {"intent", "standort", "jobs", "bm25", "aehnlichkeit"} <= set(inprocess["stufen"])
@@ -0,0 +1,94 @@
+import os
+import select
+import threading
+import time
+
+import pytest
+
+from encoder_batcher import MicroBatcher
+
+
+def gross(texte):
+    return [t.upper() for t in texte]
+
+
+def test_gebuendelt_und_in_reihenfolge():
+    batcher = MicroBatcher(gross)
+    futures = [batcher.submit(t) for t in ("a", "b", "c")]
+    assert [f.result(timeout=5) for f in futures] == ["A", "B", "C"]
+    assert batcher.stats()["items"] == 3
+
+
+def test_einzelne_anfrage_wartet_nicht_auf_das_fenster():
+    batcher = MicroBatcher(gross, window_ms=1000)
+    start = time.monotonic()
+    with batcher.unterwegs():
+        assert batcher.encode("a") == "A"
+    assert time.monotonic() - start < 0.5
+
+
+def test_wartet_auf_angemeldete_aufrufer():
+    # Der zweite Aufrufer ist angemeldet, aber noch nicht eingereiht: beide landen im selben Batch
+    batches = []
+    batcher = MicroBatcher(lambda texte: batches.append(list(texte)) or gross(texte), window_ms=2000)
+    angemeldet, weiter = threading.Event(), threading.Event()
+    ergebnisse = {}
+
+    def zweiter():
+        with batcher.unterwegs():
+            angemeldet.set()
+            weiter.wait(5)
+            ergebnisse["b"] = batcher.encode("b")
+
+    thread = threading.Thread(target=zweiter)
+    thread.start()
+    angemeldet.wait(5)
+    with batcher.unterwegs():
+        future = batcher.submit("a")
+        time.sleep(0.05)
+        weiter.set()
+        ergebnisse["a"] = future.result(timeout=5)
+    thread.join(5)
+    assert ergebnisse == {"a": "A", "b": "B"}
+    assert batches == [["a", "b"]]
+
+
+def test_abmelden_ohne_encode_schliesst_das_fenster():
+    batcher = MicroBatcher(gross, window_ms=5000)
+    angemeldet, fertig = threading.Event(), threading.Event()
+
+    def ohne_encode():
+        with batcher.unterwegs():
+            angemeldet.set()
+            fertig.wait(5)
+
+    thread = threading.Thread(target=ohne_encode)
+    thread.start()
+    angemeldet.wait(5)
+    start = time.monotonic()
+    future = batcher.submit("a")
+    time.sleep(0.05)
+    fertig.set()
+    assert future.result(timeout=5) == "A"
+    assert time.monotonic() - start < 2
+    thread.join(5)
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="nur mit fork() (gunicorn --preload)")
+def test_encode_im_geforkten_worker():
+    # Wie im Preload-Modus: der Batcher läuft schon im Elternprozess, der Worker encodiert nach fork
+    batcher = MicroBatcher(gross)
+    assert batcher.encode("master") == "MASTER"
+    lesen, schreiben = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        try:
+            os.write(schreiben, batcher.encode("worker").encode())
+        finally:
+            os._exit(0)
+    os.close(schreiben)
+    bereit, _, _ = select.select([lesen], [], [], 15)
+    ergebnis = os.read(lesen, 100) if bereit else b""
+    os.close(lesen)
+    os.waitpid(pid, 0)
+    assert ergebnis == b"WORKER"
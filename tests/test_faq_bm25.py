@@ -0,0 +1,53 @@
+from faq_bm25 import FaqBm25Index
+
+FAQ = [
+    ("Wie kann ich mich initiativ bewerben?", "Schick uns deine Bewerbung mit Lebenslauf."),
+    ("Wo kann ich parken?", "Vor jedem Zentrum gibt es Parkplätze."),
+    ("Welche Öffnungszeiten habt ihr?", "Montag bis Freitag von 8 bis 20 Uhr."),
+]
+
+
+def bester(index, frage):
+    scores = index.bewerte(frage)
+    return int(scores.argmax()), scores
+
+
+def eindeutig(index, frage):
+    return index.eindeutig(index.bewerte(frage), index.suchwoerter(frage))
+
+
+def test_eindeutige_treffer_auch_mit_kompositum_und_umlaut():
+    index = FaqBm25Index(FAQ)
+    for frage, erwartet in [("Initiativbewerbung", 0), ("Wo kann man parken?", 1), ("Oeffnungszeiten", 2)]:
+        position, _ = bester(index, frage)
+        assert position == erwartet
+    for frage in ["Wo kann man parken?", "Oeffnungszeiten", "Wie kann ich mich initiativ bewerben?"]:
+        assert eindeutig(index, frage)
+    assert index.suchwoerter("Initiativbewerbung") == ["initiativ", "bewerbung"]
+
+
+def test_treffer_nur_in_der_antwort_ist_nicht_eindeutig():
+    # "Lebenslauf" und "Parkplätze" stehen nur in Antworten: BM25 rankt sie, der Encoder entscheidet
+    index = FaqBm25Index(FAQ)
+    for frage, erwartet in [("Lebenslauf", 0), ("Parkplätze", 1), ("Initiativbewerbung", 0)]:
+        position, scores = bester(index, frage)
+        assert position == erwartet
+        assert scores[position] >= 0.8
+        assert not eindeutig(index, frage)
+
+
+def test_unbekannte_woerter_senken_den_score():
+    index = FaqBm25Index(FAQ)
+    _, bekannt = bester(index, "parken")
+    _, gemischt = bester(index, "parken Raumschiff")
+    assert gemischt[1] < bekannt[1]
+    assert not eindeutig(index, "parken Raumschiff")
+    assert not index.bewerte("Hallo").any()
+
+
+def test_scores_zwischen_null_und_eins():
+    index = FaqBm25Index(FAQ)
+    for frage, _ in FAQ:
+        scores = index.bewerte(frage)
+        assert ((scores >= 0) & (scores <= 1 + 1e-6)).all()
+    assert not eindeutig(FaqBm25Index([]), "parken")
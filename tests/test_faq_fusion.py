@@ -0,0 +1,28 @@
+import numpy as np
+
+from chat_engine import FAQ_SCHWELLE, fusioniere, faq_sicher
+
+
+def rang(kosinus, bm25):
+    return np.argsort(-fusioniere(np.array([kosinus], dtype=np.float32), np.array([bm25], dtype=np.float32)))[0]
+
+
+def test_bm25_entscheidet_nur_zwischen_fast_gleichen():
+    # 0.87 liegt nah genug an 0.9, 0.7 nicht
+    assert rang([0.9, 0.87, 0.7], [0.0, 1.0, 1.0]).tolist() == [1, 0, 2]
+
+
+def test_bm25_hebt_nicht_ueber_die_schwelle():
+    knapp_drueber = FAQ_SCHWELLE + 0.01
+    knapp_drunter = FAQ_SCHWELLE - 0.01
+    assert rang([knapp_drueber, knapp_drunter], [0.0, 1.0]).tolist() == [0, 1]
+    assert rang([knapp_drunter, knapp_drunter - 0.01], [0.0, 1.0]).tolist() == [1, 0]
+
+
+def test_schwelle_je_modus():
+    assert faq_sicher([FAQ_SCHWELLE + 0.01], "fusion")
+    assert not faq_sicher([FAQ_SCHWELLE], "fusion")
+    # BM25-Scores haben eine eigene Skala; 0.7 reicht dort nicht
+    assert not faq_sicher([0.7], "bm25")
+    assert faq_sicher([1.0], "bm25")
+    assert not faq_sicher([], None)
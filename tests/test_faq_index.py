@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+
+from faq_index import FaqVektorIndex, top_k
+
+
+def vektoren(n, dim=16, seed=0):
+    return np.random.default_rng(seed).standard_normal((n, dim)).astype(np.float32)
+
+
+@pytest.mark.parametrize("modus", ["float32", "float16", "int8"])
+def test_suche_findet_eigenen_vektor(modus):
+    daten = vektoren(50)
+    index = FaqVektorIndex.aus_vektoren(daten, ids=range(100, 150), modus=modus)
+    ids, scores = index.suche_batch(daten[[3, 17]], k=2)
+    assert ids[:, 0].tolist() == [103, 117]
+    assert np.allclose(scores[:, 0], 1.0, atol=0.02)
+    assert (scores[:, 0] >= scores[:, 1]).all()
+
+
+def test_hinzufuegen_ersetzen_entfernen():
+    daten = vektoren(5)
+    index = FaqVektorIndex.aus_vektoren(daten)
+    neu = vektoren(1, seed=1)
+    index.hinzufuegen([2], neu)
+    assert len(index) == 5
+    assert index.suche(neu[0])[0][0] == 2
+    assert index.entfernen([2, 99]) == 1
+    assert 2 not in index
+    assert sorted(index.ids.tolist()) == [0, 1, 3, 4]
+    assert index.suche(daten[4])[0][0] == 4
+
+
+def test_teilen_per_mmap(tmp_path):
+    daten = vektoren(8)
+    index = FaqVektorIndex.aus_vektoren(daten, ablage=str(tmp_path))
+    assert index.stats()["geteilt"]
+    assert len(list(tmp_path.glob("*.npy"))) == 1
+    assert index.suche(daten[5])[0][0] == 5
+
+
+def test_top_k_absteigend_und_stabil():
+    scores = np.array([[0.1, 0.9, 0.9, 0.5]])
+    assert top_k(scores, 3).tolist() == [[1, 2, 3]]
+    assert top_k(scores, 1).tolist() == [[1]]
+    assert top_k(scores, 10).shape == (1, 4)
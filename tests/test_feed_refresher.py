@@ -0,0 +1,123 @@
+import threading
+import xml.etree.ElementTree as ET
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from feed_refresher import FeedRefresher
+
+
+class FeedServer(BaseHTTPRequestHandler):
+    # Antwortet mit dem, was der Test in `antwort` hinterlegt: (status, body, etag); 304 bei passendem If-None-Match
+    antwort = (200, b"", None)
+    anfragen = []
+
+    def do_GET(self):
+        status, body, etag = self.antwort
+        self.anfragen.append(self.headers.get("If-None-Match"))
+        if etag and self.headers.get("If-None-Match") == etag:
+            status, body = 304, b""
+        self.send_response(status)
+        if etag:
+            self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def feed():
+    FeedServer.antwort, FeedServer.anfragen = (200, b"", None), []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FeedServer)
+    threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}/feed.xml"
+    server.shutdown()
+    server.server_close()
+
+
+def parse(datei):
+    return [e.text for e in ET.parse(datei).getroot()]
+
+
+def refresher(url, daten):
+    return FeedRefresher("Test", url, parse, lambda neu: daten.__setitem__("aktuell", neu), timeout=5)
+
+
+def test_200_tauscht_daten_und_merkt_etag(feed):
+    daten = {}
+    r = refresher(feed, daten)
+    FeedServer.antwort = (200, b"<feed><s>Bochum</s><s>Menden</s></feed>", '"v1"')
+    assert r.fetch_once()
+    assert daten["aktuell"] == ["Bochum", "Menden"]
+    assert (r.etag, r.generation, r.letzter_fehler) == ('"v1"', 1, None)
+
+    FeedServer.antwort = (200, b"<feed><s>Hamburg</s></feed>", '"v2"')
+    assert r.fetch_once()
+    assert FeedServer.anfragen == [None, '"v1"']
+    assert daten["aktuell"] == ["Hamburg"]
+    assert (r.etag, r.generation) == ('"v2"', 2)
+
+
+def test_304_behaelt_generation(feed):
+    daten = {}
+    r = refresher(feed, daten)
+    FeedServer.antwort = (200, b"<feed><s>Bochum</s></feed>", '"v1"')
+    assert r.fetch_once()
+    vorher = daten["aktuell"]
+    assert not r.fetch_once()
+    assert FeedServer.anfragen[-1] == '"v1"'
+    assert daten["aktuell"] is vorher
+    assert r.generation == 1
+    assert r.geladen_um is not None
+
+
+@pytest.mark.parametrize("antwort", [
+    (200, b"<feed><s>kaputt</feed>", '"v2"'),
+    (404, b"nicht da", None),
+    (200, b"<feed></feed>", '"leer"'),
+])
+def test_fehler_behaelt_alte_daten(feed, antwort):
+    daten = {}
+    r = refresher(feed, daten)
+    FeedServer.antwort = (200, b"<feed><s>Bochum</s></feed>", '"v1"')
+    assert r.fetch_once()
+    FeedServer.antwort = antwort
+    assert not r.fetch_once()
+    assert daten["aktuell"] == ["Bochum"]
+    assert (r.etag, r.generation) == ('"v1"', 1)
+    assert r.letzter_fehler
+
+
+def test_fehler_beim_indexaufbau_behaelt_alte_daten(feed):
+    daten = {}
+    r = refresher(feed, daten)
+    FeedServer.antwort = (200, b"<feed><s>Bochum</s></feed>", '"v1"')
+    assert r.fetch_once()
+
+    def kaputt(neu):
+        raise RuntimeError("Index kaputt")
+
+    r.on_update = kaputt
+    FeedServer.antwort = (200, b"<feed><s>Hamburg</s></feed>", '"v2"')
+    assert not r.fetch_once()
+    assert daten["aktuell"] == ["Bochum"]
+    assert (r.etag, r.generation, r.letzter_fehler) == ('"v1"', 1, "Index kaputt")
+
+
+def test_erster_abruf_auf_dem_refresher_thread(feed):
+    daten = {}
+    r = refresher(feed, daten)
+    r.interval = 3600
+    FeedServer.antwort = (200, b"<feed><s>Bochum</s></feed>", '"v1"')
+    r.start()
+    try:
+        for _ in range(100):
+            if r.geladen_um is not None:
+                break
+            threading.Event().wait(0.05)
+        assert daten["aktuell"] == ["Bochum"]
+    finally:
+        r.stop()
@@ -0,0 +1,39 @@
+import math
+
+from geo_index import ERDRADIUS_KM, GeoIndex
+
+STAEDTE = [
+    ("duesseldorf", 51.2277, 6.7735),
+    ("koeln", 50.9375, 6.9603),
+    ("hamburg", 53.5511, 9.9937),
+    ("muenchen", 48.1351, 11.5820),
+    ("menden", 51.4431, 7.7972),
+    ("ohne_koordinaten", None, None),
+]
+
+
+def haversine(lat1, lon1, lat2, lon2):
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    a = math.sin((p2 - p1) / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(math.radians(lon2 - lon1) / 2) ** 2
+    return 2 * ERDRADIUS_KM * math.asin(math.sqrt(a))
+
+
+def test_naechste_wie_brute_force():
+    index = GeoIndex(STAEDTE)
+    bochum = (51.4818, 7.2162)
+    erwartet = sorted(
+        (haversine(*bochum, lat, lon), id) for id, lat, lon in STAEDTE if lat is not None
+    )
+    treffer = index.naechste(*bochum, k=3)
+    assert [id for id, _ in treffer] == [id for _, id in erwartet[:3]]
+    for (_, km), (soll, _) in zip(treffer, erwartet):
+        assert abs(km - soll) < 0.01
+
+
+def test_filter_und_ohne_koordinaten():
+    index = GeoIndex(STAEDTE)
+    assert index.anzahl == 5
+    treffer = index.naechste(51.2277, 6.7735, k=10, filter=lambda id: id != "duesseldorf")
+    assert len(treffer) == 4
+    assert treffer[0][0] == "koeln"
+    assert index.naechste(51.2277, 6.7735, k=0) == []
@@ -0,0 +1,23 @@
+from keyword_automat import KeywordAutomat
+
+
+def test_findet_ueberlappende_stichwoerter_wie_teilstring_suche():
+    automat = KeywordAutomat({"job": ["job", "jobangebot"], "ort": ["bochum"], "zeit": ["uhr", "uhrzeit"]})
+    text = "Jobangebote in Bochum? Uhrzeit egal"
+    treffer = automat.scan(text)
+    for gruppe, woerter in {"job": ["job", "jobangebot"], "ort": ["bochum"], "zeit": ["uhr", "uhrzeit"]}.items():
+        assert treffer.woerter(gruppe) == {w for w in woerter if w in text.lower()}
+        assert treffer.position(gruppe) == min(text.lower().find(w) for w in woerter if w in text.lower())
+
+
+def test_gruppen_und_fehlende_gruppe():
+    automat = KeywordAutomat({"tag:montag": ["montag"], "tag:freitag": ["freitag"], "nähe": ["nähe"]})
+    treffer = automat.scan("Montag oder Freitag")
+    assert sorted(treffer.gruppen("tag:")) == ["tag:freitag", "tag:montag"]
+    assert not treffer.hat("nähe")
+    assert treffer.position("nähe") == float("inf")
+
+
+def test_norm_gilt_fuer_stichwoerter_und_text():
+    automat = KeywordAutomat({"a": ["ÄRZTIN"]}, norm=lambda t: t.lower().replace("ä", "ae"))
+    assert automat.scan("Gibt es eine aerztin?").hat("a")
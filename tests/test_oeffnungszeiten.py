@@ -0,0 +1,38 @@
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+from oeffnungszeiten import MINUTEN_PRO_TAG, OeffnungszeitenTabelle, ZEITZONE, minute_der_woche
+
+
+def standort(*zeiten):
+    # (Wochentag, von, bis) in Minuten wie Standort.oeffnungszeiten()
+    return SimpleNamespace(oeffnungszeiten=lambda: iter(zeiten))
+
+
+def test_tageszeiten_und_grenzen():
+    # Montag 08:00-18:00
+    tabelle = OeffnungszeitenTabelle([standort((0, 8 * 60, 18 * 60))])
+    montag = datetime(2025, 7, 14)
+    assert tabelle.ist_offen(0, montag.replace(hour=8))
+    assert tabelle.ist_offen(0, montag.replace(hour=17, minute=59))
+    assert not tabelle.ist_offen(0, montag.replace(hour=18))
+    assert not tabelle.ist_offen(0, montag.replace(hour=7, minute=59))
+    assert tabelle.offen_am(0).tolist() == [True]
+    assert tabelle.offen_am(1).tolist() == [False]
+
+
+def test_ueber_mitternacht_und_wochenende():
+    # Sonntag 22:00 bis Montag 02:00
+    tabelle = OeffnungszeitenTabelle([standort((6, 22 * 60, 2 * 60)), standort()])
+    assert tabelle.ist_offen(0, datetime(2025, 7, 20, 23, 0))
+    assert tabelle.ist_offen(0, datetime(2025, 7, 21, 1, 30))
+    assert not tabelle.ist_offen(0, datetime(2025, 7, 21, 2, 0))
+    assert tabelle.offen_um(datetime(2025, 7, 20, 23, 0)).tolist() == [True, False]
+
+
+def test_minute_der_woche_in_deutscher_zeit():
+    # 06:30 UTC im Sommer ist 08:30 in Berlin; naive Zeitpunkte gelten schon als Ortszeit
+    utc = datetime(2025, 7, 14, 6, 30, tzinfo=timezone.utc)
+    assert minute_der_woche(utc) == 8 * 60 + 30
+    assert minute_der_woche(datetime(2025, 7, 15, 8, 30)) == MINUTEN_PRO_TAG + 8 * 60 + 30
+    assert minute_der_woche(datetime(2025, 7, 15, 8, 30, tzinfo=ZEITZONE)) == MINUTEN_PRO_TAG + 8 * 60 + 30
@@ -0,0 +1,31 @@
+import io
+
+from chat_backend import StandortDaten, standort_shortlist, finde_standort_id
+from standort_model import parse_standorte
+
+XML = """<?xml version="1.0"?>
+<standorte>
+<standort><store_code>A</store_code><stadt>Nieder-Olm</stadt><title>Nieder-Olm</title><postleitzahl>55268</postleitzahl>
+<standort_url>https://novotergum.de/standorte/nieder-olm/</standort_url><primary_category>Physiotherapiezentrum</primary_category></standort>
+<standort><store_code>B</store_code><stadt>Salzgitter</stadt><title>Salzgitter</title><postleitzahl>38226</postleitzahl>
+<standort_url>https://novotergum.de/standorte/salzgitter/</standort_url><primary_category>Ergotherapeut</primary_category></standort>
+</standorte>"""
+
+
+def daten():
+    return StandortDaten(parse_standorte(io.BytesIO(XML.encode())))
+
+
+def test_kategorie_allein_kommt_in_die_shortlist():
+    d = daten()
+    assert standort_shortlist("wo ist das physiotherapiezentrum?", d) == [0]
+    assert standort_shortlist("ergotherapeut", d) == [1]
+    assert finde_standort_id("Wo ist das Physiotherapiezentrum?", d) == 0
+    assert finde_standort_id("Ergotherapeut", d) == 1
+
+
+def test_ort_und_tippfehler():
+    d = daten()
+    assert standort_shortlist("salzgiter", d) == [1]
+    assert finde_standort_id("Nieder-Olm", d) == 0
+    assert standort_shortlist("hamburg", d) == []